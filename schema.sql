@@ -33,3 +33,11 @@ create table public.eval_metrics (
   scores jsonb not null, -- Stores the list of scores
   created_at timestamp with time zone default timezone('utc'::text, now()) not null
 );
+
+-- 4. Indexes
+-- Foreign-key columns are not indexed automatically in Postgres. These back the
+-- per-experiment run lookups, the embedded eval_metrics joins, and the
+-- newest-first experiment list. Safe to run on an existing database.
+create index if not exists idx_model_runs_experiment_id on public.model_runs(experiment_id);
+create index if not exists idx_eval_metrics_run_id on public.eval_metrics(run_id);
+create index if not exists idx_experiments_created_at on public.experiments(created_at desc);
@@ -1,21 +1,37 @@
-import json
 import uuid
+import queue
+import orjson
+import asyncio
+import hashlib
 from typing import List, Optional
-from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import os
+import aiofiles
 
 # FORCE FIX: Unset proxies to prevent Anthropic SDK crash
 for key in ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY"]:
     if key in os.environ:
         del os.environ[key]
 
-from .models import ExperimentInput, Decision, ExperimentStatus
+from .cache import TTLCache
+from .events import ExperimentEvents
+from .models import INPUT_ADAPTER, ExperimentInput, Decision, ExperimentStatus
 from .orchestrator import OrchestrationEngine
 from .services import AIProviderService, SupabaseClient
+from .tasks import REDIS_URL, run_experiment_task
 
-app = FastAPI()
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (fastapi's own ORJSONResponse is deprecated)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+# orjson renders responses; handlers on hot paths return ORJSONResponse directly
+# so plain dicts from Supabase skip jsonable_encoder entirely.
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # CORS for local UI
 app.add_middleware(
@@ -29,7 +45,48 @@ app.add_middleware(
 # Initialize Services
 ai_service = AIProviderService()
 supabase_client = SupabaseClient()
-orchestrator = OrchestrationEngine(ai_service, supabase_client)
+experiment_events = ExperimentEvents()
+orchestrator = OrchestrationEngine(ai_service, supabase_client, events=experiment_events)
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+UPLOAD_BUFFER_POOL_SIZE = 16
+
+# Reusable chunk buffers for streaming uploads to disk (LIFO keeps recently used
+# buffers hot). Saves a fresh 1 MiB allocation per chunk under concurrent uploads.
+_upload_buffers: "queue.LifoQueue[bytearray]" = queue.LifoQueue(maxsize=UPLOAD_BUFFER_POOL_SIZE)
+
+def _acquire_buffer() -> bytearray:
+    try:
+        return _upload_buffers.get_nowait()
+    except queue.Empty:
+        return bytearray(UPLOAD_CHUNK_SIZE)
+
+def _release_buffer(buf: bytearray):
+    try:
+        _upload_buffers.put_nowait(buf)
+    except queue.Full:
+        pass
+
+async def save_upload(file: UploadFile, path: str):
+    """
+    Streams an upload to disk in chunks without blocking the event loop.
+    Chunks are read into a pooled buffer rather than allocated per read.
+    """
+    buf = _acquire_buffer()
+    view = memoryview(buf)
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            while True:
+                # Spooled uploads that rolled to disk are read off the event loop
+                if getattr(file.file, "_rolled", True):
+                    n = await asyncio.to_thread(file.file.readinto, view)
+                else:
+                    n = file.file.readinto(view)
+                if not n:
+                    break
+                await out.write(view[:n])
+    finally:
+        _release_buffer(buf)
 
 # --- Routes ---
 
@@ -48,16 +105,10 @@ async def transcribe(file: UploadFile = File(None), text: str = Form(None)):
         }
     
     if file:
-        # Save temp file
-        temp_filename = f"temp_{uuid.uuid4()}_{file.filename}"
-        with open(temp_filename, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
+        # Whisper accepts at most 25 MB, so the upload is sent straight from memory
         try:
-            result = ai_service.transcribe_audio(temp_filename)
-            # Cleanup
-            os.remove(temp_filename)
+            audio_bytes = await file.read()
+            result = await ai_service.transcribe_audio(audio_bytes, file.filename)
             return {
                 "transcript": result["transcript"],
                 "provider": "openai-whisper",
@@ -65,8 +116,6 @@ async def transcribe(file: UploadFile = File(None), text: str = Form(None)):
                 "cost_usd": result["cost_usd"]
             }
         except Exception as e:
-            if os.path.exists(temp_filename):
-                os.remove(temp_filename)
             raise HTTPException(status_code=500, detail=str(e))
 
     raise HTTPException(status_code=400, detail="Either file or text is required")
@@ -84,7 +133,7 @@ async def create_experiment(
     2. Runs orchestration in background.
     """
     try:
-        model_list_data = json.loads(models)
+        model_list_data = orjson.loads(models)
         # model_list_data expects list of {name, provider, api_key}
         
         # Convert to ExperimentInput format expected by Orchestrator
@@ -99,20 +148,30 @@ async def create_experiment(
         # OR update Orchestrator to take full config objects. 
         # For minimal friction, let's map it here.
         
-        names_list = [m["name"] for m in model_list_data]
-        keys_map = {m["name"]: m["apiKey"] for m in model_list_data} 
+        # Single pass over the incoming list builds both structures.
         # Note: UI sends 'apiKey', adjust if needed. Code used 'api_key' in py models.
+        names_list = []
+        keys_map = {}
+        providers_map = {}
+        for m in model_list_data:
+            names_list.append(m["name"])
+            keys_map[m["name"]] = m["apiKey"]
+            # Provider is optional in the UI; when unset it's inferred from the model name
+            if m.get("provider"):
+                providers_map[m["name"]] = m["provider"]
         
-        experiment_input = ExperimentInput(
-            media_id="upload", # Placeholder, updated in create_experiment
-            media_type="audio" if file else "text",
-            model_list=names_list,
-            user_api_keys=keys_map
-        )
+        experiment_input = INPUT_ADAPTER.validate_python({
+            "media_id": "upload", # Placeholder, updated in create_experiment
+            "media_type": "audio" if file else "text",
+            "model_list": names_list,
+            "user_api_keys": keys_map,
+            "model_providers": providers_map
+        })
 
         # 1. Create Experiment
         media_name = file.filename if file else "manual_text"
-        experiment_id = orchestrator.create_experiment(media_name)
+        experiment_id = await orchestrator.create_experiment(media_name)
+        response_cache.invalidate("experiments:")
 
         # 2. Save file if needed for background task
         temp_file_path = None
@@ -120,11 +179,28 @@ async def create_experiment(
         
         if file:
             temp_file_path = f"temp_{uuid.uuid4()}_{file.filename}"
-            with open(temp_file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
+            await save_upload(file, temp_file_path)
         
-        # 3. Schedule Background Task
+        # 3. Hand off to the worker queue (in-process fallback for local dev)
+        if REDIS_URL:
+            try:
+                # Publishing to the broker is blocking (and retries when Redis is slow or down)
+                task = await asyncio.to_thread(
+                    run_experiment_task.delay,
+                    experiment_id,
+                    experiment_input.model_dump_json(),
+                    temp_file_path,
+                    text_input
+                )
+            except Exception as e:
+                # The experiment row already exists; don't leave it running forever
+                await supabase_client.update_experiment_status(experiment_id, ExperimentStatus.FAILED, error=f"Failed to enqueue experiment: {e}")
+                response_cache.invalidate("experiments:")
+                if temp_file_path and os.path.exists(temp_file_path):
+                    await asyncio.to_thread(os.remove, temp_file_path)
+                raise
+            return {"experiment_id": experiment_id, "status": "running", "task_id": task.id}
+
         background_tasks.add_task(
             run_background_orchestration, 
             experiment_id, 
@@ -140,65 +216,170 @@ async def create_experiment(
 
 async def run_background_orchestration(experiment_id: str, input_data: ExperimentInput, file_path: str, text_input: str):
     try:
-        orchestrator.run_experiment_flow(experiment_id, input_data, file_path, text_input)
+        await orchestrator.run_experiment_flow(experiment_id, input_data, file_path, text_input)
     finally:
         # Cleanup temp file
         if file_path:
             if os.path.exists(file_path):
-                os.remove(file_path)
+                await asyncio.to_thread(os.remove, file_path)
+
+# --- Response caching ---
+# Only complete/failed experiments are final and cached long. Anything else
+# (running, awaiting_decision) can change in another worker or process, so it
+# gets the short TTL; decisions made here also invalidate explicitly.
+RUNNING_CACHE_TTL = 2
+SETTLED_CACHE_TTL = 300
+EXPERIMENTS_LIST_CACHE_TTL = 5
+IMMUTABLE_STATUSES = {ExperimentStatus.COMPLETE.value, ExperimentStatus.FAILED.value}
+
+response_cache = TTLCache()
+
+async def fetch_experiment_summary(experiment_id: str) -> Optional[dict]:
+    """
+    Loads the polling payload (status, recommendation, per-run results) from Supabase.
+    Returns None if the experiment does not exist.
+    """
+    # Query Supabase directly for status (only the columns the poll payload uses)
+    exp_res = await supabase_client.supabase.table("experiments").select("status,recommendation,error_log").eq("experiment_id", experiment_id).execute()
+    if not exp_res.data:
+        return None
+    
+    experiment = exp_res.data[0]
+    
+    # Get Runs & Results if ready
+    # Metrics are embedded via the eval_metrics.run_id foreign key,
+    # so runs and their scores come back in a single round-trip.
+    # raw_output is deliberately left out; see /v1/runs/{run_id}/output.
+    runs_res = await supabase_client.supabase.table("model_runs").select("model_name,cost_usd,latency_ms,eval_metrics(scores)").eq("experiment_id", experiment_id).execute()
+    runs = runs_res.data
+    
+    enriched_results = []
+    for run in runs:
+        metrics = run.get("eval_metrics") or []
+        scores = metrics[0]["scores"] if metrics else []
+        
+        # Simple aggregation for UI
+        # We assume the UI wants specific fields.
+        # Map valid heuristics to UI columns
+        enriched_results.append({
+            "model": run["model_name"],
+            "cost": f"${run.get('cost_usd', 0):.4f}",
+            "latency": f"{run.get('latency_ms', 0)}ms",
+            "scores": scores
+            # Add heuristic mapping if needed
+        })
+        
+    return {
+        "status": experiment["status"],
+        "recommendation": experiment.get("recommendation"),
+        "results": enriched_results,
+        "error_log": experiment.get("error_log")
+    }
+
+async def get_cached_summary(experiment_id: str) -> Optional[tuple]:
+    """
+    Returns (status, body, etag) for the polling payload, or None if the experiment does not exist.
+    The rendered JSON body is cached, so cache hits skip serialization too.
+    """
+    cache_key = f"experiment:{experiment_id}"
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        payload = await fetch_experiment_summary(experiment_id)
+        if payload is None:
+            return None
+        
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        ttl = SETTLED_CACHE_TTL if payload["status"] in IMMUTABLE_STATUSES else RUNNING_CACHE_TTL
+        cached = (payload["status"], body, etag)
+        response_cache.set(cache_key, cached, ttl)
+    return cached
 
 @app.get("/v1/experiment/{experiment_id}")
-async def get_experiment(experiment_id: str):
+async def get_experiment(experiment_id: str, request: Request):
     """
     Polls experiment status and results.
+    Served from a short-lived cache and tagged with an ETag so unchanged polls get a 304.
     """
     try:
-        # Query Supabase directly for status
-        exp_res = supabase_client.supabase.table("experiments").select("*").eq("experiment_id", experiment_id).execute()
-        if not exp_res.data:
+        cached = await get_cached_summary(experiment_id)
+        if cached is None:
             raise HTTPException(status_code=404, detail="Experiment not found")
         
-        experiment = exp_res.data[0]
-        
-        # Get Runs & Results if ready
-        # We can implement a JOIN or just separate queries. 
-        # For simplicity, separate queries.
-        runs_res = supabase_client.supabase.table("model_runs").select("*").eq("experiment_id", experiment_id).execute()
-        runs = runs_res.data
+        status, body, etag = cached
+        headers = {
+            "ETag": etag,
+            # Only complete/failed payloads are final; everything else must revalidate
+            "Cache-Control": f"max-age={SETTLED_CACHE_TTL}" if status in IMMUTABLE_STATUSES else "no-cache"
+        }
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
         
-        # Get Metrics
-        # This might be heavy if many runs, but we have max 3.
-        # We need to join metrics to runs.
-        # Let's just return the raw runs and let UI fetch more or include it here.
-        # Better: UI expects a consolidated result object? 
-        # The prompt says "results table once runs exist".
-        # We should enrich the runs with metrics.
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# --- Server-Sent Events ---
+# Runs executed by a Celery worker publish in another process, so the stream
+# also re-checks Supabase every SSE_REFRESH_SECONDS as a fallback.
+SSE_REFRESH_SECONDS = 10
+SSE_TERMINAL_STATUSES = {
+    ExperimentStatus.AWAITING_DECISION.value,
+    ExperimentStatus.COMPLETE.value,
+    ExperimentStatus.FAILED.value
+}
+
+async def experiment_event_stream(experiment_id: str, first: tuple):
+    """
+    Yields the polling payload as SSE frames whenever the experiment changes,
+    ending once it reaches a status that no longer changes on its own.
+    """
+    async with experiment_events.subscribe(experiment_id) as events:
+        status, body, etag = first
+        yield b"data: " + body + b"\n\n"
         
-        enriched_results = []
-        for run in runs:
-            metrics_res = supabase_client.supabase.table("eval_metrics").select("*").eq("run_id", run["run_id"]).execute()
-            scores = metrics_res.data[0]["scores"] if metrics_res.data else []
+        while status not in SSE_TERMINAL_STATUSES:
+            try:
+                await asyncio.wait_for(events.get(), timeout=SSE_REFRESH_SECONDS)
+                # A published event means the cached snapshot is stale
+                response_cache.invalidate(f"experiment:{experiment_id}")
+            except asyncio.TimeoutError:
+                pass
             
-            # Simple aggregation for UI
-            # We assume the UI wants specific fields.
-            # Map valid heuristics to UI columns
-            enriched_results.append({
-                "model": run["model_name"],
-                "cost": f"${run.get('cost_usd', 0):.4f}",
-                "latency": f"{run.get('latency_ms', 0)}ms",
-                "scores": scores
-                # Add heuristic mapping if needed
-            })
+            latest = await get_cached_summary(experiment_id)
+            if latest is None:
+                break
+            if latest[2] == etag:
+                yield b": keep-alive\n\n"
+                continue
             
-        return {
-            "status": experiment["status"],
-            "recommendation": experiment.get("recommendation"),
-            "results": enriched_results,
-            "error_log": experiment.get("error_log")
-        }
+            status, body, etag = latest
+            yield b"data: " + body + b"\n\n"
 
+@app.get("/v1/experiment/{experiment_id}/events")
+async def stream_experiment_events(experiment_id: str):
+    """
+    Streams experiment status and results as Server-Sent Events.
+    Each event carries the same payload as GET /v1/experiment/{id}; clients that
+    reconnect get the current snapshot first, so nothing is missed in between.
+    """
+    try:
+        first = await get_cached_summary(experiment_id)
+        if first is None:
+            raise HTTPException(status_code=404, detail="Experiment not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        experiment_event_stream(experiment_id, first),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/v1/experiments")
 async def list_experiments(limit: int = 50):
@@ -206,7 +387,12 @@ async def list_experiments(limit: int = 50):
     List recent experiments.
     """
     try:
-        return supabase_client.get_experiments(limit)
+        cache_key = f"experiments:{limit}"
+        experiments = response_cache.get(cache_key)
+        if experiments is None:
+            experiments = await supabase_client.get_experiments(limit)
+            response_cache.set(cache_key, experiments, EXPERIMENTS_LIST_CACHE_TTL)
+        return ORJSONResponse(experiments)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -216,10 +402,25 @@ async def get_experiment_details(experiment_id: str):
     Get full details for an experiment.
     """
     try:
-        details = supabase_client.get_experiment_details(experiment_id)
+        details = await supabase_client.get_experiment_details(experiment_id)
         if not details:
             raise HTTPException(status_code=404, detail="Experiment not found")
-        return details
+        return ORJSONResponse(details)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/v1/runs/{run_id}/output")
+async def get_run_output(run_id: str):
+    """
+    Get the raw model output for a single run (loaded on demand by the UI).
+    """
+    try:
+        output = await supabase_client.get_run_output(run_id)
+        if output is None:
+            raise HTTPException(status_code=404, detail="Run not found")
+        return ORJSONResponse(output)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -233,11 +434,13 @@ async def submit_decision(data: dict):
         decision_str = data.get("decision", "").lower() # Normalize to lowercase for Enum
         reason = data.get("decision_reason")
         
-        orchestrator.submit_human_decision(
+        await orchestrator.submit_human_decision(
             exp_id, 
             Decision(decision_str), 
             reason
         )
+        response_cache.invalidate(f"experiment:{exp_id}")
+        response_cache.invalidate("experiments:")
         return {"ok": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
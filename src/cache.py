@@ -0,0 +1,42 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+def evict_if_full(store: Dict[str, Any], key: str, maxsize: int) -> Optional[Any]:
+    """
+    Makes room for a new key in a dict bounded at maxsize.
+    Returns the evicted value, or None if nothing had to go.
+    """
+    if key in store or len(store) < maxsize:
+        return None
+    # Evict the first entry: the oldest insert, or the least recently used
+    # when the caller moves hits to the end (see ProviderInterface.get_client)
+    return store.pop(next(iter(store)))
+
+class TTLCache:
+    """
+    Minimal in-process cache with per-entry expiry.
+    Used by the API to serve repeated polls without a Supabase round-trip.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data: Dict[str, Tuple[float, Any]] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        evict_if_full(self._data, key, self.maxsize)
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, prefix: str):
+        """Drops every entry whose key starts with prefix."""
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
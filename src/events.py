@@ -0,0 +1,32 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Set
+
+class ExperimentEvents:
+    """
+    In-process pub/sub for experiment lifecycle events, keyed by experiment_id.
+    The orchestrator publishes after each persisted transition; the SSE endpoint
+    subscribes so clients are pushed updates instead of polling.
+    Events only reach subscribers in the same process (see api.experiment_events).
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def publish(self, experiment_id: str, event: Dict[str, Any]):
+        for queue in list(self._subscribers.get(experiment_id, ())):
+            queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, experiment_id: str) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[experiment_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(experiment_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[experiment_id]
@@ -1,4 +1,5 @@
 import sys
+import asyncio
 import logging
 from .models import ExperimentInput, MediaType, Decision
 from .orchestrator import OrchestrationEngine
@@ -7,7 +8,7 @@ from .orchestrator import OrchestrationEngine
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def main():
+async def main():
     logger.info("Initializing Orchestration Engine...")
     engine = OrchestrationEngine()
     
@@ -22,13 +23,13 @@ def main():
     
     # 2. Create Experiment
     logger.info("Creating Experiment...")
-    experiment_id = engine.create_experiment(input_data.media_id)
+    experiment_id = await engine.create_experiment(input_data.media_id)
     logger.info(f"Experiment Created: {experiment_id}")
     
     # 3. Run Flow (Run Models -> Evaluate -> Compare)
     logger.info("Starting Execution Loop...")
     try:
-        engine.run_experiment_flow(experiment_id, input_data)
+        await engine.run_experiment_flow(experiment_id, input_data)
         logger.info("Execution Loop Complete. Models run, evaluated, and compared.")
     except Exception as e:
         logger.error(f"Experiment Failed: {e}")
@@ -37,9 +38,9 @@ def main():
     # 4. Simulate Human Decision
     logger.info("Waiting for Human Decision... (Simulating 'SHIP')")
     decision_reason = "GPT-4o had better structure and lower latency."
-    engine.submit_human_decision(experiment_id, Decision.SHIP, decision_reason)
+    await engine.submit_human_decision(experiment_id, Decision.SHIP, decision_reason)
     
     logger.info(f"Experiment {experiment_id} marked as COMPLETE with decision SHIP.")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 # --- Enums ---
 
@@ -23,12 +23,19 @@ class ExperimentStatus(str, Enum):
 # --- Input Models ---
 
 class ExperimentInput(BaseModel):
+    # Read-only once validated, so one instance can be shared (e.g. handed to a worker)
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     media_id: str
     media_type: MediaType
     model_list: List[str] = Field(..., max_length=3, min_length=1)
     user_api_keys: Dict[str, str] # Ephemeral, not stored
+    model_providers: Optional[Dict[str, str]] = None # Explicit provider per model; inferred from the name when missing
     experiment_metadata: Optional[Dict[str, Any]] = None
 
+# Built once; validate_json parses worker payloads straight from JSON without an intermediate dict
+INPUT_ADAPTER = TypeAdapter(ExperimentInput)
+
 # --- Persistence Models (Supabase) ---
 
 class ExperimentRow(BaseModel):
@@ -1,10 +1,15 @@
+import os
+import asyncio
 import uuid
-from typing import List, Dict, Any
+import aiofiles
+from typing import List, Dict, Any, Optional
 from .models import (
     ExperimentInput, ModelRunResult, EvaluationResult, ComparisonResult,
     ExperimentStatus, Decision, EvaluationScore
 )
-from .services import AIProviderService, SupabaseClient
+from .services import AIProviderService, SupabaseClient, HEURISTIC_MAX_TOTAL
+from .events import ExperimentEvents
+from .providers.registry import infer_provider
 
 FIXED_PROMPT = """
 You are an expert editor. Please edit the following transcript for clarity, conciseness, and impact.
@@ -12,21 +17,56 @@ Maintain the original meaning but improve the flow.
 """
 
 class OrchestrationEngine:
-    def __init__(self, ai_service: AIProviderService = None, supabase_client: SupabaseClient = None):
+    def __init__(self, ai_service: AIProviderService = None, supabase_client: SupabaseClient = None, early_stop: Optional[bool] = None, events: ExperimentEvents = None):
         self.ai = ai_service or AIProviderService()
         self.supabase = supabase_client or SupabaseClient()
+        # Status changes are published here once persisted (drives the SSE endpoint)
+        self.events = events or ExperimentEvents()
+        # Opt-in (EARLY_STOP env): cancel remaining models once one reaches the maximum heuristic score.
+        # Off by default since the point of an experiment is a side-by-side comparison.
+        if early_stop is None:
+            early_stop = os.getenv("EARLY_STOP", "").lower() in ("1", "true", "yes")
+        self.early_stop = early_stop
 
-    def create_experiment(self, media_id_or_name: str) -> str:
+    async def create_experiment(self, media_id_or_name: str) -> str:
         """
         Step 1: Create experiment in Supabase.
+        The row is inserted with status RUNNING, so no follow-up status update is needed.
         """
-        experiment_id = self.supabase.create_experiment(media_id_or_name)
-        self.supabase.update_experiment_status(experiment_id, ExperimentStatus.RUNNING)
-        return experiment_id
+        return await self.supabase.create_experiment(media_id_or_name)
 
-    def run_experiment_flow(self, experiment_id: str, input_data: ExperimentInput, file_path: str = None, text_input: str = None):
+    async def _run_and_eval(self, model_name: str, transcript: str, api_key: str, provider: Optional[str] = None):
+        """
+        Runs a single model and evaluates its output.
+        Returns (model_name, result_data, eval_data, error); error is set when the provider call failed.
+        """
+        model_config = {
+            "name": model_name,
+            "provider": provider or infer_provider(model_name),
+            "api_key": api_key
+        }
+
+        try:
+            result_data = await self.ai.run_model(transcript, model_config, FIXED_PROMPT)
+        except Exception as e:
+            print(f"Error running model {model_name}: {e}")
+            return model_name, None, None, e
+
+        # Evaluation runs off the event loop so large outputs (or a future
+        # model-graded evaluator) don't stall the other in-flight runs
+        eval_data = await asyncio.to_thread(self.ai.evaluate_output, result_data["raw_output"])
+        return model_name, result_data, eval_data, None
+
+    @staticmethod
+    def _is_unbeatable(eval_data: Dict[str, Any]) -> bool:
+        """A run at the heuristic ceiling cannot be outscored by any pending run."""
+        return sum(s["score"] for s in eval_data["scores"]) >= HEURISTIC_MAX_TOTAL
+
+    async def run_experiment_flow(self, experiment_id: str, input_data: ExperimentInput, file_path: str = None, text_input: str = None):
         """
         Executes the core automated flow: Transcribe -> Run Models -> Evaluate -> Compare.
+        Models run concurrently; results are persisted in model_list order once all have finished
+        (or, with early_stop, once a run is unbeatable and the rest are cancelled).
         """
         if len(input_data.model_list) > 3:
             raise ValueError("Max 3 models allowed per experiment.")
@@ -36,7 +76,9 @@ class OrchestrationEngine:
             transcript = text_input
             if not transcript and file_path:
                 print(f"Transcribing file: {file_path}")
-                transcription_result = self.ai.transcribe_audio(file_path)
+                async with aiofiles.open(file_path, "rb") as audio_file:
+                    audio_bytes = await audio_file.read()
+                transcription_result = await self.ai.transcribe_audio(audio_bytes, os.path.basename(file_path))
                 transcript = transcription_result["transcript"]
                 # We could log transcription cost/latency here if we had a table for it
             
@@ -47,64 +89,98 @@ class OrchestrationEngine:
             run_ids = []
             runs_data_for_comparison = []
             
-            # Phase 1: Run Models
+            # Rows are accumulated and written in one bulk insert per table
+            run_rows: List[Dict[str, Any]] = []
+            eval_rows: List[Dict[str, Any]] = []
+            
+            # Phase 1: Run Models (concurrently)
             failed_models = []
+            tasks = [
+                asyncio.create_task(
+                    self._run_and_eval(
+                        model_name,
+                        transcript,
+                        input_data.user_api_keys.get(model_name, ""),
+                        (input_data.model_providers or {}).get(model_name)
+                    )
+                )
+                for model_name in input_data.model_list
+            ]
             
-            for model_name in input_data.model_list:
-                api_key = input_data.user_api_keys.get(model_name, "")
-                
-                # Identify provider (simple heuristic if not explicitly set)
-                provider = "openai"
-                if "claude" in model_name.lower(): provider = "anthropic"
-                elif "gemini" in model_name.lower(): provider = "gemini"
-                
-                model_config = {
-                    "name": model_name,
-                    "provider": provider,
-                    "api_key": api_key
-                }
-
+            # Consume runs as they finish so early stop can cancel the stragglers
+            for next_done in asyncio.as_completed(tasks):
                 try:
-                    result_data = self.ai.run_model(transcript, model_config, FIXED_PROMPT)
-                except Exception as e:
-                    print(f"Error running model {model_name}: {e}")
+                    _, result_data, eval_data, _ = await next_done
+                except Exception:
+                    break # Re-raised below, in model_list order
+                if self.early_stop and result_data is not None and self._is_unbeatable(eval_data):
+                    break
+            
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            
+            for model_name, task in zip(input_data.model_list, tasks):
+                if task.cancelled():
+                    # Record skipped run so it shows in UI; it takes no part in the comparison
+                    run_id = str(uuid.uuid4())
+                    run_rows.append(ModelRunResult(
+                        run_id=run_id,
+                        experiment_id=experiment_id,
+                        model_name=model_name,
+                        raw_output="NOT RUN: cancelled after another model reached the maximum heuristic score",
+                        latency_ms=0,
+                        cost_usd=0.0
+                    ).model_dump(mode='json'))
+                    eval_rows.append(EvaluationResult(
+                        eval_id=str(uuid.uuid4()),
+                        run_id=run_id,
+                        scores=[
+                            EvaluationScore(metric_name=name, score=0, reasoning="Not run (early stop)")
+                            for name in ("edit_quality", "structural_clarity", "publish_ready")
+                        ]
+                    ).model_dump(mode='json'))
+                    continue
+
+                # Unexpected failure outside the provider call (e.g. evaluation) fails the workflow
+                model_name, result_data, eval_data, error = task.result()
+
+                if error is not None:
                     failed_models.append(model_name)
                     
-                    # Persist failed run so it shows in UI
-                    try:
-                        run_id = str(uuid.uuid4())
-                        run_result = ModelRunResult(
-                            run_id=run_id,
-                            experiment_id=experiment_id,
-                            model_name=model_name,
-                            raw_output=f"ERROR: {str(e)}",
-                            latency_ms=0,
-                            cost_usd=0.0
-                        )
-                        self.supabase.insert_model_run(run_result)
-                        
-                        # Insert failed metrics
-                        eval_result = EvaluationResult(
-                            eval_id=str(uuid.uuid4()),
-                            run_id=run_id,
-                            scores=[
-                                EvaluationScore(metric_name="edit_quality", score=0, reasoning="Model execution failed"),
-                                EvaluationScore(metric_name="structural_clarity", score=0, reasoning=f"Error: {str(e)}"),
-                                EvaluationScore(metric_name="publish_ready", score=0, reasoning="Failed")
-                            ]
-                        )
-                        self.supabase.insert_eval_metrics(eval_result)
-                        
-                        # Add to comparison data
-                        runs_data_for_comparison.append({
-                            "model_name": model_name,
-                            "scores": [s.model_dump() for s in eval_result.scores],
-                            "latency_ms": 0,
-                            "cost_usd": 0
-                        })
-
-                    except Exception as persist_err:
-                         print(f"Failed to persist error record for {model_name}: {persist_err}")
+                    # Record failed run so it shows in UI
+                    run_id = str(uuid.uuid4())
+                    run_result = ModelRunResult(
+                        run_id=run_id,
+                        experiment_id=experiment_id,
+                        model_name=model_name,
+                        raw_output=f"ERROR: {str(error)}",
+                        latency_ms=0,
+                        cost_usd=0.0
+                    )
+                    run_rows.append(run_result.model_dump(mode='json'))
+                    
+                    # Record failed metrics
+                    eval_result = EvaluationResult(
+                        eval_id=str(uuid.uuid4()),
+                        run_id=run_id,
+                        scores=[
+                            EvaluationScore(metric_name="edit_quality", score=0, reasoning="Model execution failed"),
+                            EvaluationScore(metric_name="structural_clarity", score=0, reasoning=f"Error: {str(error)}"),
+                            EvaluationScore(metric_name="publish_ready", score=0, reasoning="Failed")
+                        ]
+                    )
+                    eval_row = eval_result.model_dump(mode='json')
+                    eval_rows.append(eval_row)
+                    
+                    # Add to comparison data (reuses the serialized scores)
+                    runs_data_for_comparison.append({
+                        "model_name": model_name,
+                        "scores": eval_row["scores"],
+                        "latency_ms": 0,
+                        "cost_usd": 0
+                    })
 
                     continue # CONTINUE TO NEXT MODEL
 
@@ -118,22 +194,19 @@ class OrchestrationEngine:
                     latency_ms=result_data["latency_ms"],
                     cost_usd=result_data["cost_usd"]
                 )
-                self.supabase.insert_model_run(run_result)
+                run_rows.append(run_result.model_dump(mode='json'))
                 run_ids.append(run_id)
                 run_results_map[run_id] = result_data["raw_output"]
                 
-                # --- EVALUATE IMMEDIATELY ---
-                eval_data = self.ai.evaluate_output(result_data["raw_output"])
-                
-                eval_id = str(uuid.uuid4())
-                scores = [EvaluationScore(**s) for s in eval_data["scores"]]
-                
+                # --- RECORD EVALUATION ---
+                # Score dicts are validated once by EvaluationResult and serialized once;
+                # the comparison reuses the evaluator's dicts as-is.
                 eval_result = EvaluationResult(
-                    eval_id=eval_id,
+                    eval_id=str(uuid.uuid4()),
                     run_id=run_id,
-                    scores=scores
+                    scores=eval_data["scores"]
                 )
-                self.supabase.insert_eval_metrics(eval_result)
+                eval_rows.append(eval_result.model_dump(mode='json'))
                 
                 # Add to comparison data
                 runs_data_for_comparison.append({
@@ -143,6 +216,12 @@ class OrchestrationEngine:
                     "cost_usd": result_data["cost_usd"]
                 })
 
+            # Phase 2: Persist (runs first, eval_metrics references model_runs)
+            if run_rows:
+                await self.supabase.bulk_insert_model_runs(run_rows)
+                await self.supabase.bulk_insert_eval_metrics(eval_rows)
+                self.events.publish(experiment_id, {"status": ExperimentStatus.RUNNING.value, "runs": len(run_rows)})
+
             if not runs_data_for_comparison:
                 raise RuntimeError(f"All models failed to process. Errors: {failed_models}")
             comparison_data = self.ai.compare_models(runs_data_for_comparison)
@@ -154,21 +233,24 @@ class OrchestrationEngine:
                 reason=comparison_data["reason"],
                 tradeoffs=comparison_data.get("tradeoffs", {})
             )
-            self.supabase.update_experiment_recommendation(comparison_result)
+            await self.supabase.update_experiment_recommendation(comparison_result)
             
             # Update status to AWAITING_DECISION
-            self.supabase.update_experiment_status(experiment_id, ExperimentStatus.AWAITING_DECISION)
+            await self.supabase.update_experiment_status(experiment_id, ExperimentStatus.AWAITING_DECISION)
+            self.events.publish(experiment_id, {"status": ExperimentStatus.AWAITING_DECISION.value})
              
         except Exception as e:
             print(f"Workflow failed: {e}")
-            self.supabase.update_experiment_status(experiment_id, ExperimentStatus.FAILED, error=str(e))
+            await self.supabase.update_experiment_status(experiment_id, ExperimentStatus.FAILED, error=str(e))
+            self.events.publish(experiment_id, {"status": ExperimentStatus.FAILED.value})
             raise e
 
-    def submit_human_decision(self, experiment_id: str, decision: Decision, reason: str):
+    async def submit_human_decision(self, experiment_id: str, decision: Decision, reason: str):
         """
         Step 4: Accept human decision and mark complete.
         """
-        self.supabase.update_experiment_decision(experiment_id, decision, reason)
-        self.supabase.update_experiment_status(experiment_id, ExperimentStatus.COMPLETE)
+        await self.supabase.update_experiment_decision(experiment_id, decision, reason)
+        await self.supabase.update_experiment_status(experiment_id, ExperimentStatus.COMPLETE)
+        self.events.publish(experiment_id, {"status": ExperimentStatus.COMPLETE.value})
 
 
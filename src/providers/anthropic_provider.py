@@ -1,31 +1,37 @@
 import time
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from .base import ProviderInterface, ProviderResult
 
 class AnthropicProvider(ProviderInterface):
     """Anthropic API implementation."""
     
-    def generate(self, prompt: str, api_key: str, model: str) -> ProviderResult:
+    def create_client(self, api_key: str) -> AsyncAnthropic:
+        return AsyncAnthropic(api_key=api_key)
+
+    async def generate(self, prompt: str, api_key: str, model: str) -> ProviderResult:
         if not api_key:
             raise ValueError(f"No API Key provided for Anthropic model {model}")
             
-        client = Anthropic(api_key=api_key)
-        
         start_time = time.time()
         
-        try:
-            message = client.messages.create(
-                model=model,
-                max_tokens=4096,
-                temperature=0.2,
-                messages=[{
-                    "role": "user", 
-                    "content": [{"type": "text", "text": prompt}]
-                }]
-            )
-            output_text = message.content[0].text
-        except Exception as e:
-            raise RuntimeError(f"Provider anthropic ({model}) failed: {str(e)}")
+        # Leased so the client isn't closed under this stream if it gets evicted
+        with self.lease_client(api_key) as client:
+            try:
+                parts = []
+                async with client.messages.stream(
+                    model=model,
+                    max_tokens=4096,
+                    temperature=0.2,
+                    messages=[{
+                        "role": "user", 
+                        "content": [{"type": "text", "text": prompt}]
+                    }]
+                ) as stream:
+                    async for text in stream.text_stream:
+                        parts.append(text)
+                output_text = "".join(parts)
+            except Exception as e:
+                raise RuntimeError(f"Provider anthropic ({model}) failed: {str(e)}")
             
         latency = int((time.time() - start_time) * 1000)
         
@@ -1,5 +1,10 @@
-from typing import Dict, Any, Optional
+import asyncio
+import inspect
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Any, Iterator, Optional, Set
 from pydantic import BaseModel
+from ..cache import evict_if_full
 
 class ProviderResult(BaseModel):
     """Standardized output from any AI provider."""
@@ -8,12 +13,101 @@ class ProviderResult(BaseModel):
     cost_usd: float
     model_name: str
 
+# Upper bound on cached SDK clients per provider (keys are supplied per session)
+MAX_CACHED_CLIENTS = 32
+
 class ProviderInterface:
     """Unified interface for all AI model providers."""
     
-    def generate(self, prompt: str, api_key: str, model: str) -> ProviderResult:
+    def __init__(self):
+        # LRU order: hits move to the end, so eviction takes the least recently used key
+        self._clients: "OrderedDict[str, Any]" = OrderedDict()
+        # Active generate() calls per client (by id) and evicted clients still in use
+        self._leases: Dict[int, int] = {}
+        self._retired: Dict[int, Any] = {}
+        # Close tasks for evicted clients, kept referenced until they finish
+        self._closing: Set[asyncio.Task] = set()
+
+    def create_client(self, api_key: str) -> Any:
+        """Builds the provider's SDK client for the given API key."""
+        raise NotImplementedError("Providers must implement create_client()")
+
+    def get_client(self, api_key: str) -> Any:
+        """
+        Returns a cached SDK client for the API key, creating it on first use.
+        Reusing the client keeps its HTTP connection pool (and TLS sessions) warm.
+        """
+        client = self._clients.get(api_key)
+        if client is not None:
+            self._clients.move_to_end(api_key)
+            return client
+
+        evicted = evict_if_full(self._clients, api_key, MAX_CACHED_CLIENTS)
+        if evicted is not None:
+            if id(evicted) in self._leases:
+                # Still streaming; closed when its last lease ends
+                self._retired[id(evicted)] = evicted
+            else:
+                self._release_client(evicted)
+        client = self._clients[api_key] = self.create_client(api_key)
+        return client
+
+    @contextmanager
+    def lease_client(self, api_key: str) -> Iterator[Any]:
+        """
+        Yields the cached client for the API key for the duration of a call.
+        A leased client evicted meanwhile is only closed once it is no longer in use.
+        """
+        client = self.get_client(api_key)
+        key = id(client)
+        self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            yield client
+        finally:
+            self._leases[key] -= 1
+            if not self._leases[key]:
+                del self._leases[key]
+                retired = self._retired.pop(key, None)
+                if retired is not None:
+                    self._release_client(retired)
+
+    def close_client(self, client: Any) -> Optional[Awaitable[None]]:
+        """Closes an SDK client's connection pool; async SDKs return the close coroutine."""
+        return client.close()
+
+    def _release_client(self, client: Any):
+        """
+        Closes an evicted client so its sockets don't linger until garbage collection.
+        Async closes are scheduled on the running loop (get_client is called from generate()).
+        """
+        try:
+            closing = self.close_client(client)
+        except Exception as e:
+            print(f"Failed to close evicted client: {e}")
+            return
+        if not inspect.isawaitable(closing):
+            return
+
+        async def _await_close():
+            try:
+                await closing
+            except Exception as e:
+                print(f"Failed to close evicted client: {e}")
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(_await_close())
+            return
+        task = loop.create_task(_await_close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def generate(self, prompt: str, api_key: str, model: str) -> ProviderResult:
         """
         Executes a prompt against the provider's specific model.
+        Implemented as a coroutine so the orchestrator can fan out across models.
+        Output is streamed from the provider and assembled before returning.
         
         Args:
             prompt: The full formatted prompt (system + user transcript).
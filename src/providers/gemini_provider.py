@@ -10,27 +10,41 @@ except ImportError:
 class GeminiProvider(ProviderInterface):
     """Google Gemini API implementation."""
     
-    def generate(self, prompt: str, api_key: str, model: str) -> ProviderResult:
+    def create_client(self, api_key: str):
+        return genai.Client(api_key=api_key)
+
+    def close_client(self, client):
+        # The sync and aio halves hold separate connection pools (close methods need a recent google-genai)
+        if hasattr(client, "close"):
+            client.close()
+        aclose = getattr(client.aio, "aclose", None)
+        return aclose() if aclose else None
+
+    async def generate(self, prompt: str, api_key: str, model: str) -> ProviderResult:
         if not genai:
             raise RuntimeError("google-genai package is not installed.")
         if not api_key:
             raise ValueError(f"No API Key provided for Gemini model {model}")
             
-        client = genai.Client(api_key=api_key)
-        
         start_time = time.time()
         
-        try:
-            response = client.models.generate_content(
-                model=model,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.2,
-                )
-            )
-            output_text = response.text
-        except Exception as e:
-            raise RuntimeError(f"Provider gemini ({model}) failed: {str(e)}")
+        # Leased so the client isn't closed under this stream if it gets evicted
+        with self.lease_client(api_key) as client:
+            try:
+                parts = []
+                async for chunk in await client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        temperature=0.2,
+                    )
+                ):
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                output_text = "".join(parts)
+            except Exception as e:
+                raise RuntimeError(f"Provider gemini ({model}) failed: {str(e)}")
             
         latency = int((time.time() - start_time) * 1000)
         
@@ -5,23 +5,34 @@ from .base import ProviderInterface, ProviderResult
 class OpenAIProvider(ProviderInterface):
     """OpenAI API implementation."""
     
-    def generate(self, prompt: str, api_key: str, model: str) -> ProviderResult:
+    def create_client(self, api_key: str) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(api_key=api_key)
+
+    async def generate(self, prompt: str, api_key: str, model: str) -> ProviderResult:
         if not api_key:
             raise ValueError(f"No API Key provided for OpenAI model {model}")
             
-        client = openai.OpenAI(api_key=api_key)
-        
         start_time = time.time()
         
-        try:
-            completion = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2  # Match context parking style (deterministic)
-            )
-            output_text = completion.choices[0].message.content
-        except Exception as e:
-            raise RuntimeError(f"Provider openai ({model}) failed: {str(e)}")
+        # Leased so the client isn't closed under this stream if it gets evicted
+        with self.lease_client(api_key) as client:
+            try:
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.2,  # Match context parking style (deterministic)
+                    stream=True
+                )
+                parts = []
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if text:
+                        parts.append(text)
+                output_text = "".join(parts)
+            except Exception as e:
+                raise RuntimeError(f"Provider openai ({model}) failed: {str(e)}")
             
         latency = int((time.time() - start_time) * 1000)
         
@@ -23,6 +23,17 @@ DEFAULT_MODELS: Dict[str, str] = {
     "gemini": "gemini-2.0-flash",
 }
 
+# Model family mapped to its provider, matched as a substring of the model name.
+# Order matters: the first family found wins (names are free text, e.g. "models/gemini-1.5-pro").
+MODEL_FAMILY_PROVIDERS: Dict[str, str] = {
+    "claude": "anthropic",
+    "gemini": "gemini",
+    "gpt": "openai",
+}
+
+# Provider instances are shared so their per-key client caches persist across calls
+_PROVIDER_INSTANCES: Dict[str, ProviderInterface] = {}
+
 def _normalize_provider(name: str) -> str:
     """Normalize and resolve aliases to canonical provider name."""
     normalized = name.lower().strip()
@@ -30,7 +41,7 @@ def _normalize_provider(name: str) -> str:
 
 def get_provider(provider_name: str) -> ProviderInterface:
     """
-    Returns an instance of the requested provider.
+    Returns the shared instance of the requested provider.
     Accepts canonical names and backward-compatible aliases.
     Raises ValueError if the provider is unknown.
     """
@@ -42,7 +53,9 @@ def get_provider(provider_name: str) -> ProviderInterface:
             f"Valid providers: {list(PROVIDER_CLASS_MAP.keys())}"
         )
         
-    return PROVIDER_CLASS_MAP[canonical]()
+    if canonical not in _PROVIDER_INSTANCES:
+        _PROVIDER_INSTANCES[canonical] = PROVIDER_CLASS_MAP[canonical]()
+    return _PROVIDER_INSTANCES[canonical]
 
 def resolve_model(provider_name: str, requested_model: str = "") -> str:
     """
@@ -58,3 +71,15 @@ def resolve_model(provider_name: str, requested_model: str = "") -> str:
         return DEFAULT_MODELS[canonical]
         
     return "unknown-model"
+
+def infer_provider(model_name: str) -> str:
+    """
+    Infers the canonical provider from a model name by scanning it for a known
+    family (e.g. "Claude 3 Haiku" -> "anthropic").
+    Unknown families fall back to "openai".
+    """
+    normalized = model_name.lower()
+    for family, provider in MODEL_FAMILY_PROVIDERS.items():
+        if family in normalized:
+            return provider
+    return "openai"
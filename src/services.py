@@ -1,10 +1,12 @@
 import os
 import json
 import time
-from typing import List, Dict, Any, Optional
-from tenacity import retry, stop_after_attempt, wait_fixed
+import functools
+from typing import List, Dict, Any, Optional, Tuple
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
 from .models import ModelRunResult, EvaluationResult, ComparisonResult, ExperimentStatus, Decision
-from supabase import create_client, Client
+import httpx
+from supabase import AsyncClient, AsyncClientOptions
 from dotenv import load_dotenv
 
 import openai
@@ -12,6 +14,38 @@ import anthropic
 
 load_dotenv()
 
+# Highest total _heuristic_scores can produce (edit 5 + structure 5 + publish 4)
+HEURISTIC_MAX_TOTAL = 14
+
+# Formatting checks only look at the start of the output; they are stable well before this
+HEURISTIC_SCAN_CHARS = 8192
+
+@functools.lru_cache(maxsize=256)
+def _heuristic_scores(raw_output: str) -> Tuple[Tuple[str, int, str], ...]:
+    """
+    Deterministic heuristics behind AIProviderService.evaluate_output.
+    Returns hashable (metric_name, score, reasoning) tuples so results can be cached.
+    """
+    # 1. Edit Quality (Length check - assuming edits should be concise)
+    length_score = 5
+    if len(raw_output) < 50: length_score = 2
+    elif len(raw_output) > 5000: length_score = 3
+
+    # 2. Structural Clarity (JSON check or just structure)
+    sample = raw_output[:HEURISTIC_SCAN_CHARS]
+    structure_score = 5 
+    if "{" in sample and "}" in sample: structure_score = 5
+    elif "\n" not in sample: structure_score = 3
+
+    # 3. Publish Ready
+    publish_score = 4
+
+    return (
+        ("edit_quality", length_score, "Heuristic based on length"),
+        ("structural_clarity", structure_score, "Heuristic based on formatting"),
+        ("publish_ready", publish_score, "Heuristic default"),
+    )
+
 class AIProviderService:
     """
     AI Provider Service. Routes model execution to OpenAI, Anthropic, or Gemini
@@ -23,23 +57,29 @@ class AIProviderService:
         self.server_openai_key = os.getenv("OPENAI_API_KEY") 
         if not self.server_openai_key:
             print("WARNING: OPENAI_API_KEY not set in env. Transcription will fail.")
+        self._transcription_client: Optional[openai.AsyncOpenAI] = None
 
-    @retry(stop=stop_after_attempt(2), wait=wait_fixed(1))
-    def transcribe_audio(self, file_path: str) -> Dict[str, Any]:
+    async def transcribe_audio(self, data: bytes, filename: str) -> Dict[str, Any]:
         """
         Transcribes audio using OpenAI Whisper.
+        Takes the audio bytes directly so retries resend the in-memory buffer
+        instead of re-reading from disk; backoff sleeps never block the event loop.
         """
         if not self.server_openai_key:
             raise ValueError("OPENAI_API_KEY not set on server for transcription.")
         
-        client = openai.OpenAI(api_key=self.server_openai_key)
+        # Reuse one client so Whisper calls share a warm connection pool
+        if self._transcription_client is None:
+            self._transcription_client = openai.AsyncOpenAI(api_key=self.server_openai_key)
+        client = self._transcription_client
         
-        start_time = time.time()
-        with open(file_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1", 
-                file=audio_file
-            )
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(2), wait=wait_exponential(multiplier=1, max=4), reraise=True):
+            with attempt:
+                start_time = time.time()
+                transcript = await client.audio.transcriptions.create(
+                    model="whisper-1", 
+                    file=(filename, data)  # filename lets Whisper detect the format
+                )
         
         latency = int((time.time() - start_time) * 1000)
         
@@ -49,7 +89,7 @@ class AIProviderService:
             "cost_usd": 0.006 * (latency / 60000) # Rough estimate $0.006/min
         }
 
-    def run_model(self, transcript: str, model_config: Dict[str, str], prompt_template: str) -> Dict[str, Any]:
+    async def run_model(self, transcript: str, model_config: Dict[str, str], prompt_template: str) -> Dict[str, Any]:
         """
         Runs the model with the given config and prompt.
         Delegates execution to the isolated provider layer via registry.
@@ -73,7 +113,7 @@ class AIProviderService:
         # Delegate to the unified provider interface
         try:
              provider_instance = get_provider(provider_name)
-             result = provider_instance.generate(
+             result = await provider_instance.generate(
                  prompt=full_prompt, 
                  api_key=api_key, 
                  model=final_model
@@ -92,25 +132,12 @@ class AIProviderService:
     def evaluate_output(self, raw_output: str) -> Dict[str, Any]:
         """
         Heuristic evaluation of the output.
+        Scores are memoized per output text; a fresh dict is built per call so callers may mutate it.
         """
-        scores = []
-        
-        # 1. Edit Quality (Length check - assuming edits should be concise)
-        length_score = 5
-        if len(raw_output) < 50: length_score = 2
-        elif len(raw_output) > 5000: length_score = 3
-        scores.append({"metric_name": "edit_quality", "score": length_score, "reasoning": "Heuristic based on length"})
-
-        # 2. Structural Clarity (JSON check or just structure)
-        structure_score = 5 
-        if "{" in raw_output and "}" in raw_output: structure_score = 5
-        elif "\n" not in raw_output: structure_score = 3
-        scores.append({"metric_name": "structural_clarity", "score": structure_score, "reasoning": "Heuristic based on formatting"})
-
-        # 3. Publish Ready
-        publish_score = 4
-        scores.append({"metric_name": "publish_ready", "score": publish_score, "reasoning": "Heuristic default"})
-
+        scores = [
+            {"metric_name": name, "score": score, "reasoning": reasoning}
+            for name, score, reasoning in _heuristic_scores(raw_output)
+        ]
         return {"scores": scores}
 
     def compare_models(self, runs_data: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -121,15 +148,17 @@ class AIProviderService:
         if not runs_data:
             return {"winning_model": "None", "reason": "No runs", "tradeoffs": {}}
 
-        # Simple logic: pick highest total score
-        best_run = None
-        best_score = -1
+        if len(runs_data) == 1:
+            # Nothing to compare against
+            only_run = runs_data[0]
+            return {
+                "winning_model": only_run["model_name"],
+                "reason": "Only one run to compare.",
+                "tradeoffs": {"latency": f"{only_run['latency_ms']}ms"}
+            }
 
-        for run in runs_data:
-            total = sum(s["score"] for s in run["scores"])
-            if total > best_score:
-                best_score = total
-                best_run = run
+        # Simple logic: pick highest total score (first run wins ties)
+        best_run = max(runs_data, key=lambda run: sum(s["score"] for s in run["scores"]))
         
         return {
             "winning_model": best_run["model_name"],
@@ -138,78 +167,106 @@ class AIProviderService:
         }
 
 
+# Column projections for read paths. raw_output can be many KB per run, so it is
+# only fetched on demand via get_run_output.
+EXPERIMENT_COLUMNS = (
+    "experiment_id,created_at,media_id,status,decision,decision_reason,"
+    "recommendation,recommendation_reason,tradeoffs,error_log"
+)
+RUN_SUMMARY_COLUMNS = "run_id,experiment_id,model_name,latency_ms,cost_usd,created_at"
+EVAL_COLUMNS = "eval_id,run_id,scores,created_at"
+
+SUPABASE_TIMEOUT_SECONDS = 30
+
 class SupabaseClient:
-    """Client for Supabase persistence."""
+    """
+    Async client for Supabase persistence.
+    All PostgREST calls share one httpx.AsyncClient, so queries reuse warm
+    keep-alive connections instead of negotiating TLS per request.
+    """
 
     def __init__(self):
         url: str = os.getenv("SUPABASE_URL")
         key: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
         if not url or not key:
             raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in .env")
-        self.supabase: Client = create_client(url, key)
+        self.http_client = httpx.AsyncClient(
+            timeout=SUPABASE_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+        # The service role key is sent as a static header, so the client can be
+        # built synchronously (no session lookup as in acreate_client).
+        self.supabase: AsyncClient = AsyncClient(url, key, AsyncClientOptions(httpx_client=self.http_client))
 
-    def create_experiment(self, media_id: str) -> str:
-        response = self.supabase.table("experiments").insert({"media_id": media_id, "status": "running"}).execute()
+    async def create_experiment(self, media_id: str) -> str:
+        response = await self.supabase.table("experiments").insert({"media_id": media_id, "status": ExperimentStatus.RUNNING.value}).execute()
         if not response.data:
             raise Exception("Failed to create experiment")
         return response.data[0]["experiment_id"]
 
-    def update_experiment_status(self, experiment_id: str, status: ExperimentStatus, error: Optional[str] = None):
+    async def update_experiment_status(self, experiment_id: str, status: ExperimentStatus, error: Optional[str] = None):
         data = {"status": status.value}
         if error:
             data["error_log"] = error
         
         print(f"[Supabase] Updating {experiment_id} -> {status}. Payload: {data}")
-        self.supabase.table("experiments").update(data).eq("experiment_id", experiment_id).execute()
+        await self.supabase.table("experiments").update(data).eq("experiment_id", experiment_id).execute()
 
-    def insert_model_run(self, result: ModelRunResult):
-        data = result.model_dump(mode='json')
-        self.supabase.table("model_runs").insert(data).execute()
+    async def insert_model_run(self, result: ModelRunResult):
+        await self.bulk_insert_model_runs([result.model_dump(mode='json')])
 
-    def insert_eval_metrics(self, result: EvaluationResult):
-        data = result.model_dump(mode='json')
-        self.supabase.table("eval_metrics").insert(data).execute()
+    async def insert_eval_metrics(self, result: EvaluationResult):
+        await self.bulk_insert_eval_metrics([result.model_dump(mode='json')])
 
-    def update_experiment_recommendation(self, result: ComparisonResult):
+    async def bulk_insert_model_runs(self, rows: List[Dict[str, Any]]):
+        """Inserts all run rows of an experiment in a single PostgREST request."""
+        await self.supabase.table("model_runs").insert(rows).execute()
+
+    async def bulk_insert_eval_metrics(self, rows: List[Dict[str, Any]]):
+        """Inserts all eval rows of an experiment in a single PostgREST request."""
+        await self.supabase.table("eval_metrics").insert(rows).execute()
+
+    async def update_experiment_recommendation(self, result: ComparisonResult):
         data = {
             "recommendation": result.winning_model,
             "recommendation_reason": result.reason,
             "tradeoffs": result.tradeoffs
         }
-        self.supabase.table("experiments").update(data).eq("experiment_id", result.experiment_id).execute()
+        await self.supabase.table("experiments").update(data).eq("experiment_id", result.experiment_id).execute()
 
-    def update_experiment_decision(self, experiment_id: str, decision: Decision, decision_reason: str):
+    async def update_experiment_decision(self, experiment_id: str, decision: Decision, decision_reason: str):
         data = {
             "decision": decision.value,
             "decision_reason": decision_reason
         }
-        self.supabase.table("experiments").update(data).eq("experiment_id", experiment_id).execute()
+        await self.supabase.table("experiments").update(data).eq("experiment_id", experiment_id).execute()
 
-    def get_experiments(self, limit: int = 50) -> List[Dict[str, Any]]:
-        response = self.supabase.table("experiments").select("*").order("created_at", desc=True).limit(limit).execute()
+    async def get_experiments(self, limit: int = 50) -> List[Dict[str, Any]]:
+        response = await self.supabase.table("experiments").select("*").order("created_at", desc=True).limit(limit).execute()
         return response.data if response.data else []
 
-    def get_experiment_details(self, experiment_id: str) -> Dict[str, Any]:
-        # Fetch experiment
-        exp_res = self.supabase.table("experiments").select("*").eq("experiment_id", experiment_id).execute()
+    async def get_experiment_details(self, experiment_id: str) -> Dict[str, Any]:
+        # Fetch experiment with its runs and their metrics embedded (one round-trip)
+        exp_res = (
+            await self.supabase.table("experiments")
+            .select(f"{EXPERIMENT_COLUMNS},model_runs({RUN_SUMMARY_COLUMNS},eval_metrics({EVAL_COLUMNS}))")
+            .eq("experiment_id", experiment_id)
+            .execute()
+        )
         if not exp_res.data:
             return None
         
         experiment = exp_res.data[0]
+        runs = experiment.pop("model_runs", None) or []
         
-        # Fetch runs
-        runs_res = self.supabase.table("model_runs").select("*").eq("experiment_id", experiment_id).execute()
-        runs = runs_res.data if runs_res.data else []
-        
-        # Enrich runs with metrics
+        # Flatten embedded metrics to the single record per run the UI expects
         enriched_runs = []
         for run in runs:
-            metrics_res = self.supabase.table("eval_metrics").select("*").eq("run_id", run["run_id"]).execute()
-            metrics = metrics_res.data[0] if metrics_res.data else None
+            metrics = run.pop("eval_metrics", None) or []
             
             run_data = {
                 **run,
-                "metrics": metrics
+                "metrics": metrics[0] if metrics else None
             }
             enriched_runs.append(run_data)
         
@@ -217,3 +274,7 @@ class SupabaseClient:
             "experiment": experiment,
             "runs": enriched_runs
         }
+
+    async def get_run_output(self, run_id: str) -> Optional[Dict[str, Any]]:
+        res = await self.supabase.table("model_runs").select("run_id,raw_output").eq("run_id", run_id).execute()
+        return res.data[0] if res.data else None
@@ -0,0 +1,54 @@
+import os
+import asyncio
+from typing import Optional
+from celery import Celery
+from dotenv import load_dotenv
+
+from .models import INPUT_ADAPTER
+from .orchestrator import OrchestrationEngine
+
+load_dotenv()
+
+# Redis-backed queue for experiment runs. When REDIS_URL is unset the API
+# falls back to in-process BackgroundTasks (see api.create_experiment).
+REDIS_URL = os.getenv("REDIS_URL")
+
+celery_app = Celery("evals", broker=REDIS_URL or "redis://localhost:6379/0")
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    worker_prefetch_multiplier=1,  # LLM calls are long; don't hoard tasks
+)
+
+# Built lazily per worker process: one engine and one event loop, so the
+# async SDK clients cached by the providers stay bound to a live loop.
+_engine: Optional[OrchestrationEngine] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_engine() -> OrchestrationEngine:
+    global _engine
+    if _engine is None:
+        _engine = OrchestrationEngine()
+    return _engine
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+@celery_app.task(name="evals.run_experiment")
+def run_experiment_task(experiment_id: str, input_data_json: str, file_path: Optional[str] = None, text_input: Optional[str] = None):
+    """
+    Runs the full experiment flow on a worker.
+    file_path must be readable by the worker (shared volume with the API).
+    """
+    input_data = INPUT_ADAPTER.validate_json(input_data_json)
+    try:
+        _get_loop().run_until_complete(
+            _get_engine().run_experiment_flow(experiment_id, input_data, file_path, text_input)
+        )
+    finally:
+        # Cleanup temp file
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
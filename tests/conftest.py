@@ -0,0 +1,21 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-integration",
+        action="store_true",
+        default=False,
+        help="run tests marked integration (they need a live Supabase project)"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Marks every non-integration test as unit; integration tests are skipped unless opted in."""
+    run_integration = config.getoption("--run-integration")
+    skip_integration = pytest.mark.skip(reason="integration test (use --run-integration)")
+    for item in items:
+        if "integration" not in item.keywords:
+            item.add_marker(pytest.mark.unit)
+        elif not run_integration:
+            item.add_marker(skip_integration)
@@ -0,0 +1,228 @@
+import asyncio
+import importlib
+import orjson
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def api():
+    """Imports src.api with placeholder Supabase settings (the client is built at import time)."""
+    patcher = pytest.MonkeyPatch()
+    patcher.setenv("SUPABASE_URL", "https://example.supabase.co")
+    patcher.setenv("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+    yield importlib.import_module("src.api")
+    patcher.undo()
+
+
+@pytest.fixture
+def client(api):
+    api.response_cache.invalidate("")  # every key starts with ""
+    return TestClient(api.app)
+
+
+def _summary(status):
+    return {"status": status, "recommendation": "model_a", "results": [], "error_log": None}
+
+
+@pytest.fixture
+def summaries(api, monkeypatch):
+    """Stubs the Supabase summary query; maps experiment_id -> payload and counts fetches."""
+    data = {}
+    fetched = []
+
+    async def fake_fetch(experiment_id):
+        fetched.append(experiment_id)
+        return data.get(experiment_id)
+
+    monkeypatch.setattr(api, "fetch_experiment_summary", fake_fetch)
+    return data, fetched
+
+
+def test_get_experiment_returns_etag_and_304_on_match(client, summaries):
+    """Verify the poll payload carries an ETag and a matching If-None-Match gets a 304."""
+    data, _ = summaries
+    data["exp_1"] = _summary("running")
+
+    first = client.get("/v1/experiment/exp_1")
+    assert first.status_code == 200
+    assert first.json() == data["exp_1"]
+    etag = first.headers["etag"]
+
+    second = client.get("/v1/experiment/exp_1", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+
+
+def test_get_experiment_unknown_id_is_404(client, summaries):
+    """Verify a missing experiment is a 404, not a 500."""
+    assert client.get("/v1/experiment/missing").status_code == 404
+
+
+@pytest.mark.parametrize("status, cache_control", [
+    ("complete", "max-age=300"),
+    ("failed", "max-age=300"),
+    ("running", "no-cache"),
+    ("awaiting_decision", "no-cache"),
+])
+def test_get_experiment_cache_control_by_status(client, summaries, status, cache_control):
+    """Verify only complete/failed payloads are marked cacheable by clients."""
+    data, _ = summaries
+    data["exp_1"] = _summary(status)
+
+    response = client.get("/v1/experiment/exp_1")
+    assert response.headers["cache-control"] == cache_control
+
+
+@pytest.mark.parametrize("status, refetched", [
+    ("complete", False),
+    ("failed", False),
+    ("running", True),
+    ("awaiting_decision", True),
+])
+def test_get_experiment_server_ttl_by_status(api, client, summaries, monkeypatch, status, refetched):
+    """Verify only complete/failed summaries get the long server-side TTL."""
+    monkeypatch.setattr(api, "RUNNING_CACHE_TTL", 0)  # short-TTL entries expire immediately
+    data, fetched = summaries
+    data["exp_1"] = _summary(status)
+
+    client.get("/v1/experiment/exp_1")
+    client.get("/v1/experiment/exp_1")
+    assert len(fetched) == (2 if refetched else 1)
+
+
+async def _open_stream(api, experiment_id):
+    first = await api.get_cached_summary(experiment_id)
+    return api.experiment_event_stream(experiment_id, first)
+
+
+async def _drain(stream):
+    return [frame async for frame in stream]
+
+
+@pytest.mark.parametrize("status", ["awaiting_decision", "complete", "failed"])
+def test_event_stream_ends_at_terminal_status(api, client, summaries, status):
+    """Verify a settled experiment gets one snapshot frame and the subscription is dropped."""
+    data, _ = summaries
+    data["exp_1"] = _summary(status)
+
+    async def collect():
+        return await _drain(await _open_stream(api, "exp_1"))
+
+    frames = asyncio.run(collect())
+    assert len(frames) == 1
+    assert frames[0].startswith(b"data: ") and frames[0].endswith(b"\n\n")
+    assert orjson.loads(frames[0][len(b"data: "):])["status"] == status
+    assert "exp_1" not in api.experiment_events._subscribers
+
+
+def test_event_stream_pushes_published_change(api, client, summaries):
+    """Verify a published event invalidates the cached snapshot and streams the new one."""
+    data, fetched = summaries
+    data["exp_1"] = _summary("running")
+
+    async def run():
+        stream = await _open_stream(api, "exp_1")
+        first = await stream.__anext__()
+        assert "exp_1" in api.experiment_events._subscribers
+
+        data["exp_1"] = _summary("awaiting_decision")
+        api.experiment_events.publish("exp_1", {"status": "awaiting_decision"})
+        # Without the invalidation the cached "running" snapshot would be re-served
+        rest = await asyncio.wait_for(_drain(stream), timeout=2)
+        return first, rest
+
+    first, rest = asyncio.run(run())
+    assert orjson.loads(first[len(b"data: "):])["status"] == "running"
+    assert [orjson.loads(f[len(b"data: "):])["status"] for f in rest] == ["awaiting_decision"]
+    assert len(fetched) == 2
+    assert "exp_1" not in api.experiment_events._subscribers
+
+
+def test_event_stream_sends_keep_alive_when_unchanged(api, client, summaries, monkeypatch):
+    """Verify a refresh that finds the same ETag emits a keep-alive comment, not a data frame."""
+    monkeypatch.setattr(api, "SSE_REFRESH_SECONDS", 0.01)
+    data, _ = summaries
+    data["exp_1"] = _summary("running")
+
+    async def run():
+        stream = await _open_stream(api, "exp_1")
+        await stream.__anext__()
+        frame = await stream.__anext__()
+        await stream.aclose()
+        return frame
+
+    assert asyncio.run(run()) == b": keep-alive\n\n"
+    assert "exp_1" not in api.experiment_events._subscribers
+
+
+def test_event_stream_unknown_id_is_404(client, summaries):
+    """Verify the SSE endpoint rejects unknown experiments before streaming."""
+    assert client.get("/v1/experiment/missing/events").status_code == 404
+
+
+_MODELS_FORM = {"models": '[{"name": "gpt-4o", "provider": "openai", "apiKey": "sk-test"}]'}
+
+
+@pytest.fixture
+def queued(api, monkeypatch, tmp_path):
+    """Routes experiments to the worker queue with Supabase and the broker stubbed; uploads land in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api, "REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(api.orchestrator, "create_experiment", AsyncMock(return_value="exp_1"))
+    monkeypatch.setattr(api.supabase_client, "update_experiment_status", AsyncMock())
+    delay = MagicMock()
+    monkeypatch.setattr(api.run_experiment_task, "delay", delay)
+    return delay
+
+
+def test_create_experiment_enqueues_worker_task(api, client, queued, tmp_path):
+    """Verify the run is handed to the worker queue and the task id is returned."""
+    queued.return_value = SimpleNamespace(id="task-1")
+
+    response = client.post("/v1/experiment", data=_MODELS_FORM, files={"file": ("clip.mp3", b"audio")})
+
+    assert response.status_code == 200
+    assert response.json() == {"experiment_id": "exp_1", "status": "running", "task_id": "task-1"}
+    experiment_id, input_json, file_path, text_input = queued.call_args.args
+    assert experiment_id == "exp_1"
+    assert api.INPUT_ADAPTER.validate_json(input_json).model_list == ["gpt-4o"]
+    assert (tmp_path / file_path).read_bytes() == b"audio"  # left for the worker to remove
+
+
+def test_create_experiment_enqueue_failure_marks_experiment_failed(api, client, queued, tmp_path):
+    """Verify a broker failure fails the experiment, refreshes the list, removes the upload and returns a 500."""
+    def broker_down(*args):
+        # A list fetched while enqueueing still shows the experiment as running
+        api.response_cache.set("experiments:50", [{"experiment_id": "exp_1", "status": "running"}], 5)
+        raise ConnectionError("broker down")
+
+    queued.side_effect = broker_down
+
+    response = client.post("/v1/experiment", data=_MODELS_FORM, files={"file": ("clip.mp3", b"audio")})
+
+    assert response.status_code == 500
+    api.supabase_client.update_experiment_status.assert_awaited_once_with(
+        "exp_1", api.ExperimentStatus.FAILED, error="Failed to enqueue experiment: broker down"
+    )
+    assert api.response_cache.get("experiments:50") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_is_saved_byte_for_byte(api, client, queued, tmp_path):
+    """Verify pooled-buffer uploads round-trip exactly, including a partial last chunk and a reused buffer."""
+    queued.return_value = SimpleNamespace(id="task-1")
+    size = 3 * api.UPLOAD_CHUNK_SIZE + 17
+    large = (bytes(range(256)) * (size // 256 + 1))[:size]
+    small = b"tail-only"  # shorter than the bytes left in the reused buffer
+    assert len(large) % api.UPLOAD_CHUNK_SIZE == 17
+
+    # The large upload spools to disk, the small one stays in memory
+    for payload in (large, small):
+        response = client.post("/v1/experiment", data=_MODELS_FORM, files={"file": ("clip.mp3", payload)})
+        assert response.status_code == 200
+        saved_path = queued.call_args.args[2]
+        assert (tmp_path / saved_path).read_bytes() == payload
@@ -0,0 +1,31 @@
+import time
+from src.cache import TTLCache
+
+def test_get_returns_value_until_expiry():
+    """Verify entries are served until their TTL elapses."""
+    cache = TTLCache()
+    cache.set("a", {"status": "running"}, ttl=0.05)
+    assert cache.get("a") == {"status": "running"}
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+def test_invalidate_by_prefix():
+    """Verify prefix invalidation only drops matching keys."""
+    cache = TTLCache()
+    cache.set("experiments:50", [], ttl=5)
+    cache.set("experiments:10", [], ttl=5)
+    cache.set("experiment:abc", {}, ttl=5)
+    cache.invalidate("experiments:")
+    assert cache.get("experiments:50") is None
+    assert cache.get("experiments:10") is None
+    assert cache.get("experiment:abc") == {}
+
+def test_maxsize_evicts_oldest():
+    """Verify the cache stays bounded by evicting the oldest entry."""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=5)
+    cache.set("b", 2, ttl=5)
+    cache.set("c", 3, ttl=5)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
@@ -1,123 +1,298 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, call
+from types import MappingProxyType
+from pydantic import ValidationError
+from unittest.mock import ANY, Mock, call
 from src.orchestrator import OrchestrationEngine
-from src.models import ExperimentInput, MediaType, Decision, ExperimentStatus
+from src.events import ExperimentEvents
+from src.services import AIProviderService, SupabaseClient
+from src.models import INPUT_ADAPTER, ExperimentInput, MediaType, Decision, ExperimentStatus
+
+# Inputs shared across tests (the orchestrator only reads them)
+_HAPPY_INPUT = ExperimentInput(
+    media_id="media_1",
+    media_type=MediaType.AUDIO,
+    model_list=["model_a", "model_b"],
+    user_api_keys={"model_a": "key1", "model_b": "key2"}
+)
+
+_SINGLE_INPUT = ExperimentInput(
+    media_id="media_1",
+    media_type=MediaType.AUDIO,
+    model_list=["model_a"],
+    user_api_keys={"model_a": "key1"}
+)
+
+# Expected call sequences for the two-model run flow. Models run concurrently,
+# so provider/evaluator calls are compared by name only; persistence is sequential.
+_HAPPY_AI_CALLS = sorted(["run_model", "run_model", "evaluate_output", "evaluate_output", "compare_models"])
+_FAILED_AI_CALLS = sorted(["run_model", "run_model", "compare_models"])
+_RUN_FLOW_SUPABASE_CALLS = [
+    call.bulk_insert_model_runs(ANY),
+    call.bulk_insert_eval_metrics(ANY),
+    call.update_experiment_recommendation(ANY),
+    call.update_experiment_status("exp_123", ExperimentStatus.AWAITING_DECISION),
+]
+
+_HAPPY_SCORES = [{"metric_name": "quality", "score": 1.0, "reasoning": "perfect"}]
+_FAILED_SCORES = [
+    {"metric_name": "edit_quality", "score": 0.0, "reasoning": "Model execution failed"},
+    {"metric_name": "structural_clarity", "score": 0.0, "reasoning": "Error: API Down"},
+    {"metric_name": "publish_ready", "score": 0.0, "reasoning": "Failed"}
+]
+
+# Happy path return values, shared read-only across tests
+_RUN_RESULT = MappingProxyType({
+    "raw_output": "test_output",
+    "latency_ms": 100,
+    "cost_usd": 0.01
+})
+
+_EVAL_RESULT = MappingProxyType({
+    "scores": (MappingProxyType({"metric_name": "quality", "score": 1.0, "reasoning": "perfect"}),)
+})
+
+_COMPARISON_RESULT = MappingProxyType({
+    "winning_model": "model_a",
+    "reason": "better",
+    "tradeoffs": MappingProxyType({"none": "none"})
+})
+
+
+# (attribute path, value) pairs applied by _prime after every reset.
+# Tests override run_model.side_effect for failures, so it is cleared explicitly.
+_AI_DEFAULTS = (
+    ("run_model.side_effect", None),
+    ("run_model.return_value", _RUN_RESULT),
+    ("evaluate_output.return_value", _EVAL_RESULT),
+    ("compare_models.return_value", _COMPARISON_RESULT),
+)
+_SUPABASE_DEFAULTS = (
+    ("create_experiment.return_value", "exp_123"),
+)
+
+
+def _apply_defaults(mock, defaults):
+    for path, value in defaults:
+        *parents, name = path.split(".")
+        target = mock
+        for parent in parents:
+            target = getattr(target, parent)
+        setattr(target, name, value)
+
+
+def _prime(ai_service, supabase):
+    """Registers the happy path return values on a freshly reset mock graph."""
+    _apply_defaults(ai_service, _AI_DEFAULTS)
+    _apply_defaults(supabase, _SUPABASE_DEFAULTS)
+
+
+@pytest.fixture(scope="module")
+def mock_graph():
+    """Mock clients built once per module; mock_clients resets them between tests."""
+    # spec'd mocks only expose the real interface; async methods become AsyncMocks
+    ai_service = Mock(spec=AIProviderService)
+    supabase = Mock(spec=SupabaseClient)
+    return ai_service, supabase
 
 
 @pytest.fixture
-def mock_clients():
-    ai_service = MagicMock()
-    supabase = MagicMock()
+def mock_clients(mock_graph):
+    ai_service, supabase = mock_graph
+    ai_service.reset_mock(side_effect=True)
+    supabase.reset_mock(side_effect=True)
+    _prime(ai_service, supabase)
+    return ai_service, supabase
 
-    # Setup happy path returns
-    ai_service.run_model.return_value = {
-        "raw_output": "test_output",
-        "latency_ms": 100,
-        "cost_usd": 0.01
-    }
 
-    ai_service.evaluate_output.return_value = {
-        "scores": [{"metric_name": "quality", "score": 1.0, "reasoning": "perfect"}]
-    }
+@pytest.fixture(scope="module")
+def engine(mock_graph):
+    """One engine per module, bound to the shared mock graph (reset by mock_clients)."""
+    return OrchestrationEngine(*mock_graph, early_stop=False)
 
-    ai_service.compare_models.return_value = {
-        "winning_model": "model_a",
-        "reason": "better",
-        "tradeoffs": {"none": "none"}
-    }
 
-    supabase.create_experiment.return_value = "exp_123"
+def test_create_experiment(mock_clients, engine):
+    ai_service, supabase = mock_clients
 
-    return ai_service, supabase
+    exp_id = asyncio.run(engine.create_experiment("media_1"))
+
+    assert exp_id == "exp_123"
+    supabase.create_experiment.assert_awaited_with("media_1")
+    # Status is set by the insert itself; no second round-trip
+    supabase.update_experiment_status.assert_not_called()
 
 
-def test_create_experiment(mock_clients):
+@pytest.mark.parametrize("side_effect, expected_run, expected_scores, expected_ai_calls", [
+    (None, {"raw_output": "test_output", "latency_ms": 100, "cost_usd": 0.01}, _HAPPY_SCORES, _HAPPY_AI_CALLS),
+    (Exception("API Down"), {"raw_output": "ERROR: API Down", "latency_ms": 0, "cost_usd": 0.0}, _FAILED_SCORES, _FAILED_AI_CALLS),
+], ids=["success", "provider_failure"])
+def test_run_experiment_flow(mock_clients, engine, side_effect, expected_run, expected_scores, expected_ai_calls):
+    """Runs are persisted in one request per table, failed ones included, and the flow ends awaiting a decision."""
     ai_service, supabase = mock_clients
-    engine = OrchestrationEngine(ai_service, supabase)
+    ai_service.run_model.side_effect = side_effect
 
-    exp_id = engine.create_experiment("media_1")
+    asyncio.run(engine.run_experiment_flow("exp_123", _HAPPY_INPUT, text_input="test transcript"))
 
-    assert exp_id == "exp_123"
-    supabase.create_experiment.assert_called_with("media_1")
-    supabase.update_experiment_status.assert_called_with("exp_123", ExperimentStatus.RUNNING)
+    # Check calls (comparison still runs on failed runs; status ends at AWAITING_DECISION, not FAILED)
+    assert sorted(name for name, _, _ in ai_service.mock_calls) == expected_ai_calls
+    assert supabase.mock_calls == _RUN_FLOW_SUPABASE_CALLS
 
+    run_rows = supabase.bulk_insert_model_runs.call_args.args[0]
+    assert run_rows == [
+        {"run_id": ANY, "experiment_id": "exp_123", "model_name": model_name, **expected_run, "created_at": ANY}
+        for model_name in _HAPPY_INPUT.model_list
+    ]
+    assert supabase.bulk_insert_eval_metrics.call_args.args[0] == [
+        {"eval_id": ANY, "run_id": row["run_id"], "scores": expected_scores, "created_at": ANY}
+        for row in run_rows
+    ]
 
-def test_run_experiment_flow_happy_path(mock_clients):
+
+def test_max_models_validation():
+    with pytest.raises(ValidationError):
+        input_data = ExperimentInput(
+            media_id="media_1",
+            media_type=MediaType.AUDIO,
+            model_list=["a", "b", "c", "d"],  # 4 models — exceeds max_length=3
+            user_api_keys={}
+        )
+
+    with pytest.raises(ValidationError):
+        INPUT_ADAPTER.validate_python({"media_id": "media_1", "media_type": "audio", "model_list": ["a", "b", "c", "d"], "user_api_keys": {}})
+
+
+def test_experiment_input_is_frozen():
+    with pytest.raises(ValidationError):
+        _SINGLE_INPUT.model_list = ["model_b"]
+
+
+def test_run_experiment_flow_runs_models_concurrently(mock_clients, engine):
+    """All provider calls are in flight before any of them completes."""
     ai_service, supabase = mock_clients
-    engine = OrchestrationEngine(ai_service, supabase)
+
+    in_flight = []
+    peak = []
+
+    async def slow_run_model(transcript, model_config, prompt):
+        in_flight.append(model_config["name"])
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(model_config["name"])
+        if model_config["name"] == "model_b":
+            raise Exception("API Down")
+        return {"raw_output": "test_output", "latency_ms": 100, "cost_usd": 0.01}
+
+    ai_service.run_model.side_effect = slow_run_model
 
     input_data = ExperimentInput(
         media_id="media_1",
         media_type=MediaType.AUDIO,
-        model_list=["model_a", "model_b"],
-        user_api_keys={"model_a": "key1", "model_b": "key2"}
+        model_list=["model_a", "model_b", "model_c"],
+        user_api_keys={"model_a": "key1", "model_b": "key2", "model_c": "key3"}
     )
 
-    engine.run_experiment_flow("exp_123", input_data, text_input="test transcript")
+    asyncio.run(engine.run_experiment_flow("exp_123", input_data, text_input="test transcript"))
 
-    # Check calls
-    assert ai_service.run_model.call_count == 2
-    assert supabase.insert_model_run.call_count == 2
+    assert max(peak) == 3
 
+    # Runs are persisted in model_list order, failures included
+    persisted = supabase.bulk_insert_model_runs.call_args.args[0]
+    assert [r["model_name"] for r in persisted] == ["model_a", "model_b", "model_c"]
+    assert persisted[1]["raw_output"] == "ERROR: API Down"
     assert ai_service.evaluate_output.call_count == 2
-    assert supabase.insert_eval_metrics.call_count == 2
 
-    ai_service.compare_models.assert_called_once()
-    supabase.update_experiment_recommendation.assert_called_once()
 
-    # After successful flow, status should be updated to AWAITING_DECISION
-    supabase.update_experiment_status.assert_called_with("exp_123", ExperimentStatus.AWAITING_DECISION)
+def test_early_stop_cancels_runs_once_leader_is_unbeatable(mock_clients):
+    """With early_stop, a run at the heuristic ceiling cancels slower models, which are recorded as not run."""
+    ai_service, supabase = mock_clients
+    engine = OrchestrationEngine(ai_service, supabase, early_stop=True)
+
+    async def run_model(transcript, model_config, prompt):
+        if model_config["name"] == "slow_model":
+            await asyncio.sleep(10)
+        return {"raw_output": "test_output", "latency_ms": 100, "cost_usd": 0.01}
 
+    ai_service.run_model.side_effect = run_model
+    ai_service.evaluate_output.return_value = {"scores": [
+        {"metric_name": "edit_quality", "score": 5, "reasoning": "max"},
+        {"metric_name": "structural_clarity", "score": 5, "reasoning": "max"},
+        {"metric_name": "publish_ready", "score": 4, "reasoning": "max"},
+    ]}
+
+    input_data = ExperimentInput(
+        media_id="media_1",
+        media_type=MediaType.AUDIO,
+        model_list=["slow_model", "fast_model"],
+        user_api_keys={"slow_model": "key1", "fast_model": "key2"}
+    )
 
-def test_max_models_validation(mock_clients):
+    asyncio.run(asyncio.wait_for(
+        engine.run_experiment_flow("exp_123", input_data, text_input="test transcript"), timeout=5
+    ))
+
+    persisted = supabase.bulk_insert_model_runs.call_args.args[0]
+    assert [r["model_name"] for r in persisted] == ["slow_model", "fast_model"]
+    assert persisted[0]["raw_output"].startswith("NOT RUN")
+
+    comparison_runs = ai_service.compare_models.call_args.args[0]
+    assert [r["model_name"] for r in comparison_runs] == ["fast_model"]
+
+
+def test_run_experiment_flow_transcribes_file_bytes(mock_clients, engine, tmp_path):
+    """Audio is read once and handed to transcription as bytes plus filename."""
     ai_service, supabase = mock_clients
-    engine = OrchestrationEngine(ai_service, supabase)
+    ai_service.transcribe_audio.return_value = {"transcript": "hello", "latency_ms": 10, "cost_usd": 0.0}
 
-    from pydantic import ValidationError
+    audio_path = tmp_path / "clip.mp3"
+    audio_path.write_bytes(b"fake-audio")
 
-    with pytest.raises(ValidationError):
-        input_data = ExperimentInput(
-            media_id="media_1",
-            media_type=MediaType.AUDIO,
-            model_list=["a", "b", "c", "d"],  # 4 models — exceeds max_length=3
-            user_api_keys={}
-        )
+    asyncio.run(engine.run_experiment_flow("exp_123", _SINGLE_INPUT, file_path=str(audio_path)))
+
+    ai_service.transcribe_audio.assert_awaited_once_with(b"fake-audio", "clip.mp3")
+    assert ai_service.run_model.call_args.args[0] == "hello"
 
 
-def test_workflow_single_model_failure_still_completes(mock_clients):
-    """When a model fails, orchestrator persists the error and still runs comparison."""
+def test_run_experiment_flow_publishes_status_events(mock_clients):
+    """Subscribers receive each persisted transition, ending at awaiting_decision."""
     ai_service, supabase = mock_clients
-    engine = OrchestrationEngine(ai_service, supabase)
+    events = ExperimentEvents()
+    engine = OrchestrationEngine(ai_service, supabase, events=events)
 
-    # Simulate API failure
-    ai_service.run_model.side_effect = Exception("API Down")
+    async def run():
+        async with events.subscribe("exp_123") as queue:
+            await engine.run_experiment_flow("exp_123", _SINGLE_INPUT, text_input="test transcript")
+            return [queue.get_nowait() for _ in range(queue.qsize())]
 
+    received = asyncio.run(run())
+
+    assert [e["status"] for e in received] == [
+        ExperimentStatus.RUNNING.value,
+        ExperimentStatus.AWAITING_DECISION.value
+    ]
+    assert events._subscribers == {}
+
+
+def test_run_experiment_flow_prefers_explicit_provider(mock_clients, engine):
+    """A provider chosen in the UI wins; otherwise it is inferred from the model name."""
+    ai_service, supabase = mock_clients
     input_data = ExperimentInput(
         media_id="media_1",
         media_type=MediaType.AUDIO,
-        model_list=["model_a"],
-        user_api_keys={"model_a": "key1"}
+        model_list=["my-custom-model", "Claude 3 Haiku"],
+        user_api_keys={"my-custom-model": "key1", "Claude 3 Haiku": "key2"},
+        model_providers={"my-custom-model": "anthropic"}
     )
 
-    # Orchestrator catches individual model failures, persists them, and continues
-    engine.run_experiment_flow("exp_123", input_data, text_input="test transcript")
-
-    # Failed run should still be persisted
-    supabase.insert_model_run.assert_called_once()
-    supabase.insert_eval_metrics.assert_called_once()
-
-    # Comparison still runs with the failed run data
-    ai_service.compare_models.assert_called_once()
+    asyncio.run(engine.run_experiment_flow("exp_123", input_data, text_input="test transcript"))
 
-    # Status ends at AWAITING_DECISION (not FAILED)
-    supabase.update_experiment_status.assert_called_with("exp_123", ExperimentStatus.AWAITING_DECISION)
+    providers = {c.args[1]["name"]: c.args[1]["provider"] for c in ai_service.run_model.call_args_list}
+    assert providers == {"my-custom-model": "anthropic", "Claude 3 Haiku": "anthropic"}
 
 
-def test_submit_human_decision(mock_clients):
+def test_submit_human_decision(mock_clients, engine):
     ai_service, supabase = mock_clients
-    engine = OrchestrationEngine(ai_service, supabase)
 
-    engine.submit_human_decision("exp_123", Decision.SHIP, "It is good")
+    asyncio.run(engine.submit_human_decision("exp_123", Decision.SHIP, "It is good"))
 
     supabase.update_experiment_decision.assert_called_with("exp_123", Decision.SHIP, "It is good")
     supabase.update_experiment_status.assert_called_with("exp_123", ExperimentStatus.COMPLETE)
@@ -1,10 +1,14 @@
+import asyncio
 import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 from pydantic import ValidationError
 # Imports structured exactly like test_orchestrator.py (from src.<module>)
-from src.providers.registry import get_provider, resolve_model
+from src.providers.registry import get_provider, resolve_model, infer_provider
 from src.providers.gemini_provider import GeminiProvider
 from src.providers.openai_provider import OpenAIProvider
 from src.providers.anthropic_provider import AnthropicProvider
+from src.providers.base import MAX_CACHED_CLIENTS
 
 def test_registry_canonical_gemini():
     """Verify that 'gemini' resolves to the GeminiProvider explicitly."""
@@ -37,3 +41,97 @@ def test_resolve_model_explicit():
     """Verify explicit models override defaults."""
     assert resolve_model("gemini", "gemini-pro") == "gemini-pro"
     assert resolve_model("openai", "gpt-3.5") == "gpt-3.5"
+
+def test_infer_provider_from_model_family():
+    """Verify model names map to providers by family, defaulting to OpenAI."""
+    assert infer_provider("claude-3-haiku-20240307") == "anthropic"
+    assert infer_provider("Claude 3 Haiku") == "anthropic"
+    assert infer_provider("claude3-opus") == "anthropic"
+    assert infer_provider("claude_3_haiku") == "anthropic"
+    assert infer_provider("Gemini-2.0-flash") == "gemini"
+    assert infer_provider("models/gemini-1.5-pro") == "gemini"
+    assert infer_provider("gemini1.5-pro") == "gemini"
+    assert infer_provider("Gemini 1.5 Pro") == "gemini"
+    assert infer_provider("gpt-4o") == "openai"
+    assert infer_provider("o1") == "openai"
+    assert infer_provider("model_a") == "openai"
+
+def test_registry_reuses_provider_instances():
+    """Verify aliases and repeat lookups share one provider instance."""
+    assert get_provider("gemini") is get_provider("google")
+    assert get_provider("openai") is get_provider("OpenAI ")
+
+def test_provider_client_cached_per_api_key():
+    """Verify SDK clients are built once per key and reused."""
+    provider = OpenAIProvider()
+    client = provider.get_client("sk-one")
+    assert provider.get_client("sk-one") is client
+    assert provider.get_client("sk-two") is not client
+
+def test_provider_closes_evicted_clients():
+    """Verify a client evicted from a full cache has its connection pool closed."""
+    provider = OpenAIProvider()
+    provider.create_client = lambda api_key: MagicMock(close=AsyncMock())
+
+    async def fill_cache():
+        first = provider.get_client("sk-0")
+        for i in range(1, MAX_CACHED_CLIENTS + 1):
+            provider.get_client(f"sk-{i}")
+        await asyncio.sleep(0)  # let the scheduled close run
+        return first
+
+    first = asyncio.run(fill_cache())
+    first.close.assert_awaited_once()
+    assert "sk-0" not in provider._clients
+    assert len(provider._clients) == MAX_CACHED_CLIENTS
+
+def test_provider_client_cache_is_lru():
+    """Verify a recently used key survives eviction and the least recently used one goes."""
+    provider = OpenAIProvider()
+    provider.create_client = lambda api_key: MagicMock(close=MagicMock())
+
+    first = provider.get_client("sk-0")
+    for i in range(1, MAX_CACHED_CLIENTS):
+        provider.get_client(f"sk-{i}")
+    assert provider.get_client("sk-0") is first  # hit moves sk-0 to the end
+    provider.get_client("sk-new")
+
+    assert "sk-0" in provider._clients
+    assert "sk-1" not in provider._clients
+    first.close.assert_not_called()
+
+def test_provider_defers_closing_evicted_client_in_use():
+    """Verify a client evicted mid-call is only closed once its lease ends."""
+    provider = OpenAIProvider()
+    provider.create_client = lambda api_key: MagicMock(close=AsyncMock())
+
+    async def evict_while_leased():
+        with provider.lease_client("sk-0") as client:
+            for i in range(1, MAX_CACHED_CLIENTS + 1):
+                provider.get_client(f"sk-{i}")
+            await asyncio.sleep(0)
+            assert "sk-0" not in provider._clients
+            client.close.assert_not_awaited()
+        await asyncio.sleep(0)  # let the scheduled close run
+        return client
+
+    client = asyncio.run(evict_while_leased())
+    client.close.assert_awaited_once()
+    assert provider._leases == {} and provider._retired == {}
+
+def test_openai_provider_assembles_streamed_output():
+    """Verify streamed deltas are joined into raw_output, skipping empty and choice-less chunks."""
+    async def fake_stream():
+        for text in ["Hello", None, ", world"]:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+        yield SimpleNamespace(choices=[])  # trailing usage chunk
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=fake_stream())
+    provider = OpenAIProvider()
+    provider.get_client = lambda api_key: client
+
+    result = asyncio.run(provider.generate("prompt", "sk-test", "gpt-4o"))
+
+    assert result.raw_output == "Hello, world"
+    assert client.chat.completions.create.call_args.kwargs["stream"] is True
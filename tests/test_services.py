@@ -0,0 +1,55 @@
+import asyncio
+from unittest.mock import AsyncMock
+from src.models import ModelRunResult
+from src.services import AIProviderService, SupabaseClient, _heuristic_scores
+
+def test_evaluate_output_heuristics():
+    """Verify heuristic scores for a short single-line output."""
+    result = AIProviderService().evaluate_output("too short")
+    assert result == {"scores": [
+        {"metric_name": "edit_quality", "score": 2, "reasoning": "Heuristic based on length"},
+        {"metric_name": "structural_clarity", "score": 3, "reasoning": "Heuristic based on formatting"},
+        {"metric_name": "publish_ready", "score": 4, "reasoning": "Heuristic default"},
+    ]}
+
+def test_evaluate_output_memoized_per_text():
+    """Verify repeat outputs hit the cache but callers get independent dicts."""
+    service = AIProviderService()
+    _heuristic_scores.cache_clear()
+
+    first = service.evaluate_output("same output\nfor both models")
+    first["scores"][0]["score"] = 99
+    second = service.evaluate_output("same output\nfor both models")
+
+    assert _heuristic_scores.cache_info().hits == 1
+    assert second["scores"][0]["score"] == 2
+
+def _run(model_name, *scores):
+    return {
+        "model_name": model_name,
+        "scores": [{"metric_name": f"m{i}", "score": s, "reasoning": ""} for i, s in enumerate(scores)],
+        "latency_ms": 100,
+        "cost_usd": 0.01
+    }
+
+def test_compare_models_single_run_short_circuits():
+    """Verify a lone run is returned as the winner without scoring."""
+    result = AIProviderService().compare_models([_run("gpt-4o", 0, 0)])
+    assert result["winning_model"] == "gpt-4o"
+    assert result["reason"] == "Only one run to compare."
+
+def test_compare_models_picks_highest_total_first_on_ties():
+    """Verify the highest total wins and ties go to the earlier run."""
+    service = AIProviderService()
+    assert service.compare_models([_run("a", 2, 3), _run("b", 5, 4), _run("c", 4, 5)])["winning_model"] == "b"
+    assert service.compare_models([_run("a", 5, 4), _run("b", 4, 5)])["winning_model"] == "a"
+
+def test_insert_model_run_delegates_to_bulk_insert():
+    """Verify single-row inserts go through the bulk path as a one-element list."""
+    client = SupabaseClient.__new__(SupabaseClient)  # skip env/httpx setup
+    client.bulk_insert_model_runs = AsyncMock()
+    result = ModelRunResult(run_id="r1", experiment_id="e1", model_name="m", raw_output="out", latency_ms=1, cost_usd=0.0)
+
+    asyncio.run(client.insert_model_run(result))
+
+    client.bulk_insert_model_runs.assert_awaited_once_with([result.model_dump(mode='json')])
@@ -0,0 +1,8 @@
+import pytest
+from verify_supabase import verify_connection
+
+
+@pytest.mark.integration
+def test_verify_connection_counts_experiments():
+    """Verify the HEAD count probe reaches the configured Supabase project."""
+    assert verify_connection() is not None
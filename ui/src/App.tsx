@@ -31,7 +31,7 @@ function App() {
   const [experimentData, setExperimentData] = useState<any | null>(null);
 
   // Polling ref
-  const pollIntervalRef = useRef<number | null>(null);
+  const eventSourceRef = useRef<EventSource | null>(null);
 
   const handleNavigate = (view: string) => {
     setCurrentView(view);
@@ -78,7 +78,7 @@ function App() {
       // UI models have {name, provider, apiKey}
       const modelsPayload = validModels.map(m => ({
         name: m.name,
-        provider: m.provider || "openai", // Default fallback
+        provider: m.provider, // Empty: backend infers it from the model name
         apiKey: m.apiKey
       }));
       formData.append('models', JSON.stringify(modelsPayload));
@@ -106,67 +106,83 @@ function App() {
     }
   };
 
+  const applyExperimentUpdate = (data: any): boolean => {
+    // Update experiment data fully
+    setExperimentData({
+      status: data.status,
+      decision: data.decision || null, // Backend might not send if null
+      decision_reason: data.decision_reason || null
+    });
+
+    const status = data.status?.toLowerCase() || 'unknown';
+
+    // Always update results if present (partial or full)
+    if (data.results && data.results.length > 0) {
+      const uiResults = data.results.map((r: any) => {
+        const getScore = (name: string) => r.scores?.find((s: any) => s.metric_name === name)?.score || 0;
+        const editQuality = getScore('edit_quality');
+        const readyScore = getScore('publish_ready');
+
+        return {
+          model: r.model || "Unknown Model",
+          effort: editQuality > 3 ? 'Low' : 'Medium',
+          quality: editQuality >= 4 ? 'High' : (editQuality >= 3 ? 'Medium' : 'Low'),
+          ready: readyScore >= 4 ? 'Yes' : 'No',
+          cost: r.cost,
+          latency: r.latency,
+          isWinner: r.model === data.recommendation
+        };
+      });
+      setResults(uiResults);
+    }
+
+    if (status === 'failed') {
+      setLoading(false);
+      // Verbose debug alert
+      const errorMsg = data.error_log || "No error_log in response";
+      alert(`Experiment Failed!\nStatus: ${status}\nError: ${errorMsg}\n\nFull Response:\n${JSON.stringify(data, null, 2)}`);
+      return true;
+    }
+    else if (status === 'complete' || status === 'awaiting_decision') {
+      // Terminal state logic
+      setLoading(false);
+      return true;
+    }
+    // Still running (e.g. "running")
+    setLoadingText(`Status: ${data.status}...`);
+    return false;
+  };
+
+  const fetchExperimentOnce = async (id: string) => {
+    try {
+      const res = await fetch(`${API_BASE}/experiment/${id}`);
+      if (!res.ok) return;
+      applyExperimentUpdate(await res.json());
+    } catch (e) {
+      console.error("Status fetch error", e);
+    }
+  };
+
   const startPolling = (id: string) => {
-    if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
-
-    pollIntervalRef.current = window.setInterval(async () => {
-      try {
-        const res = await fetch(`${API_BASE}/experiment/${id}`);
-        if (!res.ok) return;
-
-        const data = await res.json();
-        // console.log(`Poll Status [${id}]:`, data); 
-
-        // Update experiment data fully
-        setExperimentData({
-          status: data.status,
-          decision: data.decision || null, // Backend might not send if null
-          decision_reason: data.decision_reason || null
-        });
-
-        const status = data.status?.toLowerCase() || 'unknown';
-
-        // Always update results if present (partial or full)
-        if (data.results && data.results.length > 0) {
-          const uiResults = data.results.map((r: any) => {
-            const getScore = (name: string) => r.scores?.find((s: any) => s.metric_name === name)?.score || 0;
-            const editQuality = getScore('edit_quality');
-            const readyScore = getScore('publish_ready');
-
-            return {
-              model: r.model || "Unknown Model",
-              effort: editQuality > 3 ? 'Low' : 'Medium',
-              quality: editQuality >= 4 ? 'High' : (editQuality >= 3 ? 'Medium' : 'Low'),
-              ready: readyScore >= 4 ? 'Yes' : 'No',
-              cost: r.cost,
-              latency: r.latency,
-              isWinner: r.model === data.recommendation
-            };
-          });
-          setResults(uiResults);
-        }
-
-        if (status === 'failed') {
-          clearInterval(pollIntervalRef.current!);
-          setLoading(false);
-          // Verbose debug alert
-          const errorMsg = data.error_log || "No error_log in response";
-          alert(`Experiment Failed!\nStatus: ${status}\nError: ${errorMsg}\n\nFull Response:\n${JSON.stringify(data, null, 2)}`);
-        }
-        else if (status === 'complete' || status === 'awaiting_decision') {
-          // Terminal state logic
-          setLoading(false);
-          clearInterval(pollIntervalRef.current!);
-        }
-        else {
-          // Still running (e.g. "running")
-          setLoadingText(`Status: ${data.status}...`);
-        }
-
-      } catch (e) {
-        console.error("Polling error", e);
+    eventSourceRef.current?.close();
+
+    // Server pushes the status payload on every change (no fixed-interval polling)
+    const source = new EventSource(`${API_BASE}/experiment/${id}/events`);
+    eventSourceRef.current = source;
+
+    source.onmessage = (event) => {
+      if (applyExperimentUpdate(JSON.parse(event.data))) {
+        source.close();
+      }
+    };
+
+    source.onerror = () => {
+      // The browser reconnects on its own (and gets a fresh snapshot); if it
+      // gave up, fall back to a single GET for the latest state.
+      if (source.readyState === EventSource.CLOSED) {
+        fetchExperimentOnce(id);
       }
-    }, 2000);
+    };
   };
 
   const handleDecision = async (decision: 'SHIP' | 'ITERATE' | 'ROLLBACK', reason: string) => {
@@ -5,7 +5,6 @@ const API_BASE = 'http://localhost:8000/v1';
 interface DetailedRun {
     run_id: string;
     model_name: string;
-    raw_output: string;
     latency_ms: number;
     cost_usd: number;
     metrics: {
@@ -45,6 +44,8 @@ export const ExperimentDetailView: React.FC<ExperimentDetailViewProps> = ({ expe
 
     // Collapsible states for raw output
     const [openOutputs, setOpenOutputs] = useState<Record<string, boolean>>({});
+    // Raw outputs are fetched on first expand (not included in the details payload)
+    const [rawOutputs, setRawOutputs] = useState<Record<string, string>>({});
 
     useEffect(() => {
         const fetchDetails = async () => {
@@ -63,8 +64,17 @@ export const ExperimentDetailView: React.FC<ExperimentDetailViewProps> = ({ expe
         fetchDetails();
     }, [experimentId]);
 
-    const toggleOutput = (runId: string) => {
+    const toggleOutput = async (runId: string) => {
         setOpenOutputs(prev => ({ ...prev, [runId]: !prev[runId] }));
+        if (rawOutputs[runId] !== undefined) return;
+        try {
+            const res = await fetch(`${API_BASE}/runs/${runId}/output`);
+            if (!res.ok) throw new Error('Failed to fetch output');
+            const json = await res.json();
+            setRawOutputs(prev => ({ ...prev, [runId]: json.raw_output ?? '' }));
+        } catch (err: any) {
+            setRawOutputs(prev => ({ ...prev, [runId]: `Error: ${err.message}` }));
+        }
     };
 
     if (loading) return <div className="p-12 text-gray-400">Loading details...</div>;
@@ -173,7 +183,7 @@ export const ExperimentDetailView: React.FC<ExperimentDetailViewProps> = ({ expe
                                 </button>
                                 {openOutputs[run.run_id] && (
                                     <pre className="p-4 text-xs text-gray-300 font-mono bg-black overflow-x-auto whitespace-pre-wrap border-t border-gray-800">
-                                        {run.raw_output}
+                                        {rawOutputs[run.run_id] ?? 'Loading output...'}
                                     </pre>
                                 )}
                             </div>
@@ -1,32 +1,123 @@
 import os
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Optional, Tuple
+import httpx
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 
-load_dotenv()
+try:
+    import asyncpg
+except ImportError:  # optional: only needed for the direct Postgres check
+    asyncpg = None
 
-def verify_connection():
-    url: str = os.getenv("SUPABASE_URL")
-    key: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+log = logging.getLogger("verify_supabase")
+
+# Pool sized for a short-lived checker sharing Supavisor's client limit;
+# idle connections are recycled after 30 minutes. The short timeout keeps a
+# hung network from blocking the check.
+SUPABASE_TIMEOUT_SECONDS = 2
+SUPABASE_MAX_CONNECTIONS = 15
+SUPABASE_MAX_KEEPALIVE = 5
+SUPABASE_KEEPALIVE_EXPIRY_SECONDS = 1800
+
+# The direct Postgres check runs a single query, so the pool stays small
+DB_POOL_MIN_SIZE = 1
+DB_POOL_MAX_SIZE = 2
+
+@lru_cache(maxsize=1)
+def _load_env_once() -> Tuple[Optional[str], Optional[str]]:
+    """Parses .env on first use and snapshots the Supabase settings."""
+    load_dotenv()
+    return os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+@lru_cache(maxsize=1)
+def get_client() -> Client:
+    """
+    Returns a shared Supabase client so repeated checks reuse its
+    httpx connection pool instead of re-handshaking.
+    """
+    url, key = _load_env_once()
+    http_client = httpx.Client(
+        timeout=SUPABASE_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY_SECONDS
+        )
+    )
+    # httpx_client needs supabase>=2.16.0 (pinned in requirements.txt)
+    options = ClientOptions(
+        postgrest_client_timeout=SUPABASE_TIMEOUT_SECONDS,
+        storage_client_timeout=SUPABASE_TIMEOUT_SECONDS,
+        httpx_client=http_client
+    )
+    return create_client(url, key, options=options)
+
+def verify_connection() -> Optional[int]:
+    """
+    Checks the Supabase connection with a HEAD count on experiments.
+    Returns the experiment count, or None if the check failed.
+    """
+    url, key = _load_env_once()
     
     if not url or not key:
-        print("Error: Missing env vars")
-        return
+        log.error("Missing env vars: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required")
+        return None
 
     try:
-        supabase: Client = create_client(url, key)
-        print(f"Connecting to {url}...")
-        
-        # Try a lightweight operation. 
-        # Since we don't know if tables exist yet, we'll try to just list the 'experiments' table 
-        # or just check if client init didn't explode.
-        # Ideally, we select count.
+        supabase = get_client()
+        log.info("Connecting to %s...", url)
         
-        response = supabase.table("experiments").select("count", count="exact").execute()
-        print("Connection successful!")
-        print(f"Found {response.count} experiments.")
+        # HEAD request: the count comes back in the Content-Range header,
+        # so no rows are serialized or transferred.
+        response = supabase.table("experiments").select("*", count="exact", head=True).execute()
+        log.info("Connection successful! Found %d experiments.", response.count)
+        return response.count
         
     except Exception as e:
-        print(f"Connection failed: {e}")
+        log.error("Connection failed: %s", e)
+        return None
+
+async def verify_database_async() -> Optional[int]:
+    """
+    Checks the direct Postgres connection (SUPABASE_DB_URL) through an asyncpg pool.
+    Returns the experiment count, or None if the check was skipped or failed.
+    """
+    _load_env_once()
+    dsn = os.getenv("SUPABASE_DB_URL")
+    if not dsn:
+        return None
+    if asyncpg is None:
+        log.warning("Skipping database check: asyncpg is not installed")
+        return None
+
+    try:
+        # statement_cache_size=0: Supavisor's transaction mode can't hold prepared statements
+        async with asyncpg.create_pool(
+            dsn=dsn,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            timeout=SUPABASE_TIMEOUT_SECONDS,
+            statement_cache_size=0
+        ) as pool:
+            async with pool.acquire() as conn:
+                count = await conn.fetchval("SELECT count(*) FROM experiments")
+        log.info("Database connection successful! Found %d experiments.", count)
+        return count
+
+    except Exception as e:
+        log.error("Database connection failed: %s", e)
+        return None
+
+async def verify_connection_async():
+    """Runs the PostgREST and direct Postgres checks concurrently."""
+    return await asyncio.gather(
+        asyncio.to_thread(verify_connection),
+        verify_database_async()
+    )
 
 if __name__ == "__main__":
-    verify_connection()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(levelname)s %(message)s")
+    asyncio.run(verify_connection_async())